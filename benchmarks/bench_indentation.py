@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+"""
+Time the indentation-sensitive example grammar (see `examples/`) on a
+generated document of the same shape as `basic-indented-structure.txt`.
+
+    python benchmarks/bench_indentation.py --lists 200 --repeat 5
+
+To see the speedup of the current tree over an earlier revision, give
+`--against` a git revision: the benchmark is then also run (in a separate
+process) with `megaparsy` and `examples` as they were at that revision.
+
+    python benchmarks/bench_indentation.py --against 02c5ebf
+"""
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import timeit
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+# where to import `megaparsy` and the example grammar from
+ROOT = os.environ.get('MEGAPARSY_BENCH_ROOT', os.path.dirname(HERE))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'examples'))
+
+from indentation_sensitive import p_item_list  # noqa: E402
+
+
+# the example parses a single list, documents here have many
+parser = p_item_list.at_least(1)
+
+
+def make_document(lists, paragraphs=5, notes=4):
+    lines = []
+    for i in range(lists):
+        lines.append('chapter-{}'.format(i))
+        for j in range(paragraphs):
+            lines.append('  paragraph-{} # comment'.format(j))
+            for k in range(notes):
+                lines.append('      note-{} more words here'.format(k))
+                lines.append('        continued-{}'.format(k))
+    return '\n'.join(lines) + '\n'
+
+
+def bench(lists, repeat):
+    """
+    Returns:
+        Tuple[int, float]: lines in the document, best time in seconds
+    """
+    document = make_document(lists)
+    timer = timeit.Timer(lambda: parser.parse(document))
+    best = min(timer.repeat(repeat=repeat, number=1))
+    return document.count('\n'), best
+
+
+def bench_revision(revision, lists, repeat):
+    """
+    Run the benchmark with `megaparsy` and `examples` from `revision`.
+
+    Returns:
+        float: best time in seconds
+    """
+    archive = subprocess.run(
+        ['git', 'archive', '--format=tar', revision, 'megaparsy', 'examples'],
+        cwd=os.path.dirname(HERE),
+        stdout=subprocess.PIPE,
+        check=True,
+    ).stdout
+    with tempfile.TemporaryDirectory() as root:
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            tar.extractall(root)
+        output = subprocess.run(
+            [
+                sys.executable, os.path.abspath(__file__),
+                '--lists', str(lists),
+                '--repeat', str(repeat),
+                '--seconds',
+            ],
+            env=dict(os.environ, MEGAPARSY_BENCH_ROOT=root),
+            stdout=subprocess.PIPE,
+            check=True,
+            universal_newlines=True,
+        ).stdout
+    return float(output)
+
+
+def report(label, lines, repeat, best):
+    print('{label}: {lines} lines: best of {repeat}: {best:.3f}s '
+          '({rate:.0f} lines/s)'.format(
+              label=label,
+              lines=lines,
+              repeat=repeat,
+              best=best,
+              rate=lines / best,
+          ))
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('--lists', type=int, default=200)
+    argparser.add_argument('--repeat', type=int, default=5)
+    argparser.add_argument(
+        '--against', metavar='REVISION',
+        help='also time the benchmark at this git revision, for comparison',
+    )
+    argparser.add_argument(
+        '--seconds', action='store_true', help=argparse.SUPPRESS,
+    )
+    args = argparser.parse_args()
+
+    lines, best = bench(args.lists, args.repeat)
+    if args.seconds:
+        print(best)
+        sys.exit()
+
+    if args.against:
+        before = bench_revision(args.against, args.lists, args.repeat)
+        report(args.against, lines, args.repeat, before)
+    report('current', lines, args.repeat, best)
+    if args.against:
+        print('speedup: {:.2f}x'.format(before / best))
@@ -17,6 +17,7 @@ from megaparsy.char.lexer import (
     line_fold,
     non_indented,
     skip_line_comment,
+    skip_regex,
 )
 
 
@@ -27,7 +28,7 @@ line_comment = skip_line_comment("#")
 scn = space(char.space1, line_comment)
 
 # parser which only matches ' ' and '\t', but *not* newlines
-_space1_no_nl = parsy.regex(r'( |\t)+').result('')
+_space1_no_nl = skip_regex(r'( |\t)+')
 sc = space(_space1_no_nl, line_comment)
 
 # factory for parser returning tokens separated by no-newline whitespace
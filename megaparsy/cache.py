@@ -0,0 +1,150 @@
+"""
+Opt-in on-disk cache of parsed top-level blocks, for parsing many mostly
+unchanged files across runs.
+
+The input is split into top-level (`non_indented`) constructs as for
+`megaparsy.parallel`, and the pickled result of each one is stored under a
+hash of the grammar fingerprint and the construct's text. Blocks whose
+text hasn't changed since a previous run are loaded rather than parsed.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+
+import parsy
+
+from megaparsy.parallel import split_blocks
+
+
+class BlockCache(object):
+    """
+    Args:
+        directory: where to keep the cache files (created if needed)
+        fingerprint: identifies the grammar; it must change whenever the
+            grammar (or what its results look like) does, otherwise stale
+            results will be loaded. Parsers can't be hashed meaningfully,
+            so this is up to you, e.g. a version string.
+        max_size: total size in bytes of cache files to keep. When it is
+            exceeded the least recently used entries are removed.
+
+    Entries which can't be loaded count as misses. NOTE: entries are
+    unpickled, which can run arbitrary code, so `directory` must not be
+    writable by anyone you don't trust.
+    """
+
+    SUFFIX = '.block'
+
+    def __init__(self, directory, fingerprint, max_size=256 * 1024 * 1024):
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, text):
+        digest = hashlib.sha256()
+        digest.update(self.fingerprint.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(text.encode('utf-8', 'surrogatepass'))
+        return os.path.join(self.directory, digest.hexdigest() + self.SUFFIX)
+
+    def _load(self, path):
+        """
+        Returns:
+            Tuple[bool, Any]: (found, value)
+        """
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except Exception:
+            # unreadable, truncated, or made with classes which have since
+            # been renamed or moved: just parse again
+            return False, None
+        try:
+            # mark as recently used
+            os.utime(path)
+        except OSError:
+            pass
+        return True, value
+
+    def _store(self, path, value):
+        try:
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # result can't be cached, never mind
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits `max_size`.
+        """
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(self.SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_size:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_size:
+                break
+
+    def parse_blocks(self, parser, stream, line_comment=None):
+        """
+        Split `stream` into top-level constructs (see
+        `megaparsy.parallel.split_blocks`) and parse each one with `parser`,
+        loading the result from the cache if the same text was parsed
+        before with the same grammar fingerprint.
+
+        Returns:
+            List[Any]: result for each construct, in input order
+
+        Raises:
+            parsy.ParseError: at the position of the first failing
+                construct, relative to the whole of `stream`
+        """
+        starts = split_blocks(stream, line_comment)
+        results = []
+        stored = False
+        try:
+            for start, end in zip(starts, starts[1:] + [len(stream)]):
+                text = stream[start:end]
+                path = self._path(text)
+                found, value = self._load(path)
+                if not found:
+                    try:
+                        value = parser.parse(text)
+                    except parsy.ParseError as e:
+                        raise parsy.ParseError(
+                            e.expected, stream, start + e.index
+                        )
+                    self._store(path, value)
+                    stored = True
+                results.append(value)
+        finally:
+            if stored:
+                self.evict()
+        return results
@@ -1,3 +1,5 @@
+import re
+
 import parsy
 
 
@@ -10,5 +12,95 @@ eol = (newline | crlf).desc('end of line')
 tab = parsy.string('\t')
 
 space = parsy.whitespace.optional().result('')
+space.pattern = r'\s*'
 
 space1 = parsy.whitespace.result('')
+space1.pattern = r'\s+'
+
+
+def _take(predicate, min_count, label):
+    """
+    A parser consuming the longest run (of at least `min_count`) of
+    characters satisfying `predicate`, returning the consumed slice.
+
+    `predicate` may be a callable, or a collection of characters (e.g. a
+    `str`), in which case the run is matched with a single regex character
+    class rather than testing one character at a time.
+    """
+    if callable(predicate):
+        if label is None:
+            label = getattr(predicate, '__name__', 'predicate')
+
+        @parsy.Parser
+        def parser(stream, index):
+            end = index
+            length = len(stream)
+            while end < length and predicate(stream[end]):
+                end += 1
+            if end - index < min_count:
+                return parsy.Result.failure(end, label)
+            return parsy.Result.success(end, stream[index:end])
+
+        return parser
+
+    chars = ''.join(sorted(set(predicate)))
+    if not chars:
+        raise ValueError('no characters to take')
+    pattern = '[{}]{}'.format(
+        re.escape(chars), '+' if min_count else '*'
+    )
+    if label is None:
+        label = 'one of {!r}'.format(chars)
+    match = re.compile(pattern).match
+
+    @parsy.Parser
+    def parser(stream, index):
+        found = match(stream, index)
+        if found is None:
+            return parsy.Result.failure(index, label)
+        return parsy.Result.success(found.end(), found.group())
+
+    parser.pattern = pattern
+    return parser
+
+
+def take_while(predicate, label=None):
+    """
+    Consume the (possibly empty) run of characters satisfying `predicate`
+    and return it. `predicate` is a callable, or a string or set of the
+    characters to take, e.g. `take_while('01')` or `take_while(str.isalnum)`.
+
+    takeWhileP :: Maybe String -> (Token s -> Bool) -> m (Tokens s)
+    """
+    return _take(predicate, 0, label)
+
+
+def take_while1(predicate, label=None):
+    """
+    Like `take_while`, but fails unless at least one character is taken.
+
+    takeWhile1P :: Maybe String -> (Token s -> Bool) -> m (Tokens s)
+    """
+    return _take(predicate, 1, label)
+
+
+def take_p(count, label=None):
+    """
+    Consume exactly `count` characters, whatever they are, and return them.
+    Fails if there are fewer than that left. As in Megaparsec, a `count` of
+    zero or less returns an empty string without consuming anything.
+
+    takeP :: Maybe String -> Int -> m (Tokens s)
+    """
+    count = max(count, 0)
+    if label is None:
+        label = '{} characters'.format(count)
+
+    @parsy.Parser
+    def parser(stream, index):
+        end = index + count
+        if end > len(stream):
+            return parsy.Result.failure(len(stream), label)
+        return parsy.Result.success(end, stream[index:end])
+
+    return parser
@@ -0,0 +1,357 @@
+"""
+Layout pre-lexer for indentation-sensitive grammars.
+
+Instead of checking columns while parsing (as `megaparsy.char.lexer` does)
+the input is first split into a flat stream of tokens in a single pass,
+the same way CPython's tokenizer does it:
+
+    first-chapter           LINE NEWLINE
+      paragraph-one         INDENT LINE NEWLINE
+          note-A            INDENT LINE NEWLINE
+          note-B            LINE NEWLINE
+      paragraph-two         DEDENT LINE NEWLINE
+                            DEDENT
+
+The combinators in this module then parse that token stream, so block
+structure is just a matter of matching INDENT and DEDENT tokens. The text
+of each line is parsed with ordinary character-level parsers via `line`.
+"""
+import re
+from collections import namedtuple
+
+import parsy
+
+from megaparsy.char.lexer import IndentMany, IndentNone, IndentSome
+from megaparsy.utils import from_maybe
+
+
+INDENT = 'INDENT'
+DEDENT = 'DEDENT'
+NEWLINE = 'NEWLINE'
+LINE = 'LINE'
+
+Token = namedtuple('Token', ('type', 'value', 'index', 'column'))
+# where:
+#   `value` is the text of the line (without indentation) for LINE tokens,
+#     the new indent column for INDENT/DEDENT, or '' for NEWLINE
+#   `index` is the offset in the source text the token corresponds to
+#   `column` is the indent column of the line the token belongs to
+
+
+def _is_blank(text, line_comment):
+    return not text or (line_comment is not None and text.startswith(line_comment))
+
+
+def _bracket_scanner(brackets, line_comment, quotes):
+    """
+    Regex finding the brackets in a line, skipping over any comment and
+    (single-line) string literals so brackets inside them are not counted.
+    """
+    alternatives = ['[{}]'.format(re.escape(''.join(brackets)))]
+    if line_comment:
+        alternatives.append(re.escape(line_comment) + r'[^\n]*')
+    for quote in quotes:
+        alternatives.append(
+            r'{q}(?:[^{q}\\\n]|\\.)*{q}'.format(q=re.escape(quote))
+        )
+    return re.compile('|'.join(alternatives))
+
+
+def _bracket_depth(scanner, openers, closers, stream, start, end, depth):
+    for match in scanner.finditer(stream, start, end):
+        char = match.group()
+        if char in openers:
+            depth += 1
+        elif char in closers and depth > 0:
+            depth -= 1
+    return depth
+
+
+def tokenize(stream, line_comment=None, brackets=None, quotes=''):
+    """
+    Split `stream` into a list of layout tokens in one pass.
+
+    Lines which are empty or contain only white space are skipped, as are
+    lines holding only a comment if `line_comment` prefix is given (comments
+    after content on a line are left in the LINE text for the line's own
+    parser to deal with).
+
+    Indentation is measured in characters, same as the column numbers used
+    by `megaparsy.char.lexer`, so a tab counts as a single column.
+
+    If `brackets` are given, indentation is suspended inside them (the
+    offside rule's implicit line joining): while any bracket is open, the
+    following lines are joined on to the current LINE token, newlines and
+    all, and their indentation is ignored. The line's parser (e.g. using
+    `between`) then needs a space consumer which accepts newlines.
+
+    Args:
+        stream: the input text
+        line_comment: prefix of comments that may occupy a whole line
+        brackets: pairs of opening and closing characters, e.g.
+            `('()', '[]', '{}')`
+        quotes: quote characters of single-line string literals, inside
+            which brackets are not counted, e.g. `'"\''`
+
+    Returns:
+        List[Token]
+
+    Raises:
+        parsy.ParseError: if a line dedents to a column which does not
+            match any enclosing indentation level
+    """
+    if brackets:
+        openers = {pair[0] for pair in brackets}
+        closers = {pair[1] for pair in brackets}
+        scanner = _bracket_scanner(
+            [c for pair in brackets for c in pair], line_comment, quotes
+        )
+    else:
+        scanner = None
+
+    tokens = []
+    levels = [0]
+    offset = 0
+    length = len(stream)
+    while offset < length:
+        end = stream.find('\n', offset)
+        if end == -1:
+            end = length
+        raw = stream[offset:end]
+        if raw.endswith('\r'):
+            raw = raw[:-1]
+        text = raw.lstrip(' \t')
+        if not _is_blank(text, line_comment):
+            col = len(raw) - len(text)
+            start = offset + col
+            if col > levels[-1]:
+                levels.append(col)
+                tokens.append(Token(INDENT, col, start, col))
+            else:
+                while col < levels[-1]:
+                    levels.pop()
+                    tokens.append(Token(DEDENT, levels[-1], start, col))
+                if col != levels[-1]:
+                    raise parsy.ParseError(
+                        frozenset(['dedent to {}'.format(levels[-1])]),
+                        stream,
+                        start,
+                    )
+            if scanner is not None:
+                depth = _bracket_depth(
+                    scanner, openers, closers, stream, start, end, 0
+                )
+                while depth and end < length:
+                    line_start = end + 1
+                    end = stream.find('\n', line_start)
+                    if end == -1:
+                        end = length
+                    depth = _bracket_depth(
+                        scanner, openers, closers, stream, line_start, end, depth
+                    )
+                text = stream[start:end]
+            tokens.append(Token(LINE, text.rstrip(' \t\r'), start, col))
+            tokens.append(Token(NEWLINE, '', end, col))
+        offset = end + 1
+
+    while len(levels) > 1:
+        levels.pop()
+        tokens.append(Token(DEDENT, levels[-1], length, 0))
+    return tokens
+
+
+def parse(parser, stream, line_comment=None, brackets=None, quotes=''):
+    """
+    Tokenize `stream` and parse the whole token stream with `parser`
+    (see `tokenize` for the other arguments).
+
+    Unlike calling `parser.parse(tokenize(stream))` directly, a ParseError
+    raised from here refers to a position in the source text rather than
+    an index into the token list.
+    """
+    tokens = tokenize(stream, line_comment, brackets, quotes)
+    try:
+        return parser.parse(tokens)
+    except parsy.ParseError as e:
+        if e.index < len(tokens):
+            # where within the line it failed, if it was in a `line`
+            offset = max(
+                (getattr(x, 'offset', 0) for x in e.expected), default=0
+            )
+            index = tokens[e.index].index + offset
+        else:
+            index = len(stream)
+        raise parsy.ParseError(e.expected, stream, index)
+
+
+def _token(type_):
+    return parsy.test_item(lambda t: t.type == type_, type_)
+
+
+indent = _token(INDENT)
+dedent = _token(DEDENT)
+newline = _token(NEWLINE)
+
+
+class _LineExpected(str):
+    """
+    What a `line` expected, remembering the offset within the line where
+    `p_content` failed, so that `parse` can report it in the source text.
+    """
+
+    def __new__(cls, value, offset):
+        self = super().__new__(cls, value)
+        self.offset = offset
+        return self
+
+
+def line(p_content):
+    """
+    Parse one logical line: a LINE token whose text must be consumed
+    entirely by the character-level parser `p_content`, followed by its
+    NEWLINE token.
+
+    Returns:
+        the value returned by `p_content`
+    """
+    @parsy.Parser
+    def parser(stream, index):
+        if index < len(stream) and stream[index].type == LINE:
+            token = stream[index]
+            result = (p_content << parsy.eof)(token.value, 0)
+            if result.status:
+                return (newline.result(result.value))(stream, index + 1)
+            return parsy.Result.failure(index, _LineExpected(
+                'line: {}'.format(', '.join(sorted(result.expected))),
+                result.furthest,
+            ))
+        return parsy.Result.failure(index, LINE)
+
+    return parser
+
+
+def non_indented(p_content):
+    """
+    Token-stream version of `megaparsy.char.lexer.non_indented`: succeeds
+    only if the next line starts at column 0.
+    """
+    @parsy.Parser
+    def parser(stream, index):
+        if index < len(stream) and stream[index].type == LINE:
+            if stream[index].column == 0:
+                return p_content(stream, index)
+            return parsy.Result.failure(
+                index,
+                'indent_guard: {actual} == 0'.format(actual=stream[index].column),
+            )
+        return parsy.Result.failure(index, LINE)
+
+    return parser
+
+
+def _block_items(p, min_items):
+    """
+    Items of an indented block, up to and including its DEDENT.
+    """
+    items = p.times(min_items, float('inf'))
+    return items << dedent
+
+
+def indent_block(p_reference):
+    """
+    Token-stream version of `megaparsy.char.lexer.indent_block`.
+
+    `p_reference` should parse the whole reference line (e.g. using `line`)
+    and return one of IndentNone | IndentMany | IndentSome, just as for the
+    character-level `indent_block`. Indented items are whatever follows
+    between the INDENT token after the reference line and its matching
+    DEDENT; each one is parsed with the `p` of the IndentMany/IndentSome.
+
+    When an explicit `indent` level is given it is checked against the
+    column of the INDENT token.
+    """
+    @parsy.generate
+    def parser():
+        """
+        Raises:
+            TypeError: if `p_reference` does not return one of
+                IndentNone | IndentMany | IndentSome
+        """
+        indent_opt = yield p_reference
+
+        if isinstance(indent_opt, IndentNone):
+            return indent_opt.val
+
+        elif isinstance(indent_opt, (IndentMany, IndentSome)):
+            maybe_indent, f, p = indent_opt
+            token = yield indent.optional()
+            if token is None:
+                if isinstance(indent_opt, IndentSome):
+                    return parsy.fail(INDENT)
+                return f([])
+            lvl = from_maybe(token.value, maybe_indent)
+            if token.value != lvl:
+                return parsy.fail(
+                    'indent_block: {lvl} == {pos}'.format(
+                        lvl=lvl,
+                        pos=token.value,
+                    )
+                )
+            min_items = 1 if isinstance(indent_opt, IndentSome) else 0
+            vals = yield _block_items(p, min_items)
+            return f(vals)
+
+        else:
+            raise TypeError('Must be one of IndentNone|IndentMany|IndentSome')
+
+    return parser
+
+
+def _fold_lines(stream, index):
+    """
+    Collect the text of a line and all the lines indented beneath it.
+    """
+    lines = [stream[index].value]
+    index += 2  # LINE, NEWLINE
+    depth = 0
+    while index < len(stream):
+        token = stream[index]
+        if token.type == INDENT:
+            depth += 1
+        elif token.type == DEDENT:
+            if depth == 0:
+                break
+            depth -= 1
+            if depth == 0:
+                index += 1
+                break
+        elif token.type == LINE:
+            if depth == 0:
+                break
+            lines.append(token.value)
+        index += 1
+    return lines, index
+
+
+def line_fold(p_content):
+    """
+    Token-stream version of `megaparsy.char.lexer.line_fold`.
+
+    A fold is a line together with any lines indented beneath it. Their
+    text is joined with newlines and parsed with `p_content`, so (as with
+    the character-level version) white space in `p_content` *must* consume
+    newlines between the components of the fold.
+    """
+    @parsy.Parser
+    def parser(stream, index):
+        if not (index + 1 < len(stream) and stream[index].type == LINE):
+            return parsy.Result.failure(index, LINE)
+        lines, end = _fold_lines(stream, index)
+        result = (p_content << parsy.eof)('\n'.join(lines), 0)
+        if result.status:
+            return parsy.Result.success(end, result.value)
+        return parsy.Result.failure(
+            index, 'line_fold: {}'.format(', '.join(sorted(result.expected)))
+        )
+
+    return parser
@@ -1,9 +1,21 @@
 import operator
+import re
+import sys
 from collections import namedtuple
+from decimal import Decimal
+from functools import lru_cache
 
 import parsy
 
 from megaparsy import char
+from megaparsy.position import (
+    column_at,
+    indent_table,
+    line_start_at,
+    # (so that `space()`'s `skip_table` argument doesn't shadow it)
+    skip_table as get_skip_table,
+)
+from megaparsy.state import parse_state
 from megaparsy.utils import try_, from_maybe
 
 
@@ -13,11 +25,102 @@ OPERATOR_MAP = {
     operator.lt: '<',
 }
 
+NO_LINE_COMMENT = parsy.fail('line-comment')
+
+NO_BLOCK_COMMENT = parsy.fail('block-comment')
+
+
+def skip_regex(pattern):
+    """
+    A parser which skips whatever matches `pattern`, returning ''.
+
+    Unlike `parsy.regex(pattern).result('')`, the parser remembers its
+    `pattern`, so that `space()` can fuse it with the other parts of a
+    space consumer into a single regex.
+    """
+    parser = parsy.regex(pattern).result('')
+    parser.pattern = pattern
+    return parser
+
+
+_DEFAULT_FLAGS = re.compile('').flags
+
+_BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+
+
+def _fusable(pattern):
+    """
+    Whether `pattern` means the same thing as part of a bigger regex: it
+    must not set global inline flags, e.g. `(?i)`, which would apply to
+    the whole regex (or not compile, if not at the start), or have
+    backreferences, whose group numbers would be shifted.
+    """
+    try:
+        compiled = re.compile(pattern)
+    except re.error:
+        return False
+    return (
+        compiled.flags == _DEFAULT_FLAGS
+        and not _BACKREFERENCE.search(pattern)
+    )
+
+
+def _fused_space(patterns):
+    """
+    One regex doing the work of `space()` for parts known to be regexes.
+
+    Each part is optional and regex alternatives are never revisited once
+    the overall match succeeds (which it always does), so this consumes
+    exactly what running the parts one after another would.
+    """
+    pattern = ''.join('(?:{})?'.format(p) for p in patterns)
+    match = re.compile(pattern).match
+
+    @parsy.Parser
+    def parser(stream, index):
+        return parsy.Result.success(match(stream, index).end(), '')
+
+    parser.pattern = pattern
+    return parser
+
+
+def _skip_cached(p_skip):
+    """
+    Wrap a space consumer so that it remembers (in the `ParseState` for the
+    input) where it ended up from each offset, and the same run of white
+    space and comments is only scanned once however many combinators
+    consume it.
+    """
+    @parsy.Parser
+    def parser(stream, index):
+        memo = parse_state(stream).skips
+        key = (p_skip, index)
+        result = memo.get(key)
+        if result is None:
+            result = memo[key] = p_skip(stream, index)
+        return result
+
+    return parser
+
+
+def _table_space(space_pattern, comment_patterns):
+    """
+    Space consumer for `space(..., skip_table=True)`: looks up where the
+    white space and comments end in the `SkipTable` for the input.
+    """
+    @parsy.Parser
+    def parser(stream, index):
+        table = get_skip_table(stream, space_pattern, comment_patterns)
+        return parsy.Result.success(table.skip(index), '')
+
+    return parser
+
 
 def space(
     p_space=char.space,
-    p_line_comment=parsy.fail('line-comment'),
-    p_block_comment=parsy.fail('block-comment')
+    p_line_comment=NO_LINE_COMMENT,
+    p_block_comment=NO_BLOCK_COMMENT,
+    skip_table=False,
 ):
     """
     Produces a parser that consumes white space in general. It's expected
@@ -30,20 +133,90 @@ def space(
             You can use 'char.space' for this purpose, or your own parser
             (if you don't want to automatically consume newlines, for example).
             Make sure the parser does not succeed on empty input though.
+            A regex pattern string may be given instead of a parser, and is
+            treated as `skip_regex(pattern)`.
         p_line_comment: is used to parse line comments. You can use
             'megaparsy.skip_line_comment` if you don't need anything special.
         p_block_comment: is used to parse block (multi-line) comments. You can
             use `megaparsy.skip_block_comment` or `skip_block_comment_nested`
             if you don't need anything special.
+        skip_table: instead of one pass of white space, line comment and
+            block comment, skip *any* sequence of white space and comments,
+            by looking it up in a table precomputed for the whole input on
+            first use (see `megaparsy.position.SkipTable`). Meant for inputs
+            full of comments and blank lines. Every part must be regex-based
+            (`char.space`, `skip_regex`, `skip_line_comment`,
+            `skip_block_comment`...), with patterns which can be combined
+            into one regex (see below), and white space must be made of
+            single characters.
+
+    Raises:
+        ValueError: if `skip_table` is requested for parts which aren't
+            regex-based
 
     If you don't want to match a kind of comment, simply pass `parsy.fail()`
     and `space` will just move on or finish depending on whether there is more
     white space for it to consume.
+
+    When every part is known to be a regex (`char.space`, `char.space1`,
+    `skip_regex`, `skip_line_comment`...) they are compiled together into a
+    single regex, so consuming white space and a comment is one `match` call.
+    (Unless a pattern has global inline flags or backreferences, which
+    wouldn't mean the same in the combined regex; then the parts are run
+    one after another.)
+
+    When built from `char.space` or `char.space1` plus (optionally) a
+    `skip_line_comment` parser, the result is also marked so that
+    `indent_guard` can skip indentation using a precomputed `IndentTable`
+    instead of running the parser.
+
+    The parser remembers where it ended from each offset of the input being
+    parsed, so running it again at the same place (e.g. `lexeme` trailing
+    space followed by the space consumer of `indent_block`) is a lookup.
     """
-    return parsy.success('')\
-        .skip(p_space.optional())\
-        .skip(p_line_comment.optional())\
-        .skip(p_block_comment.optional())
+    if isinstance(p_space, str):
+        p_space = skip_regex(p_space)
+
+    parts = [p_space]
+    if p_line_comment is not NO_LINE_COMMENT:
+        parts.append(p_line_comment)
+    if p_block_comment is not NO_BLOCK_COMMENT:
+        parts.append(p_block_comment)
+    patterns = [getattr(p, 'pattern', None) for p in parts]
+
+    if skip_table:
+        if None in patterns or not all(_fusable(p) for p in patterns):
+            raise ValueError(
+                'skip_table requires regex-based parts, e.g. skip_regex(), '
+                'without global inline flags or backreferences'
+            )
+        return _table_space(patterns[0], tuple(patterns[1:]))
+
+    p_skip = None
+    if None not in patterns and all(_fusable(p) for p in patterns):
+        try:
+            p_skip = _fused_space(patterns)
+        except re.error:
+            # e.g. the same group name used in two parts
+            pass
+    if p_skip is None:
+        p_skip = parsy.success('')\
+            .skip(p_space.optional())\
+            .skip(p_line_comment.optional())\
+            .skip(p_block_comment.optional())
+    parser = _skip_cached(p_skip)
+    if hasattr(p_skip, 'pattern'):
+        parser.pattern = p_skip.pattern
+
+    if (
+        p_space in (char.space, char.space1)
+        and p_block_comment is NO_BLOCK_COMMENT
+    ):
+        if p_line_comment is NO_LINE_COMMENT:
+            parser.layout_comment = None
+        elif hasattr(p_line_comment, 'prefix'):
+            parser.layout_comment = p_line_comment.prefix
+    return parser
 
 
 def lexeme(p_lexeme, p_space=char.space):
@@ -64,19 +237,231 @@ def symbol(symbol, p_space=char.space):
     return lexeme(parsy.string(symbol), p_space=p_space)
 
 
-def skip_line_comment(prefix):
+def _trie_pattern(words):
+    """
+    A regex matching the longest of `words` found, built from a trie of
+    the words so that matching costs as much as the length of the match
+    rather than the number of words.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for c in word:
+            node = node.setdefault(c, {})
+        node[None] = None
+
+    def pattern(node):
+        alternatives = [
+            re.escape(c) + pattern(node[c])
+            for c in sorted(c for c in node if c is not None)
+        ]
+        if not alternatives:
+            return ''
+        joined = '|'.join(alternatives)
+        if None in node:
+            # (greedy, so the longer words are tried first)
+            return '(?:{})?'.format(joined)
+        if len(alternatives) == 1:
+            return joined
+        return '(?:{})'.format(joined)
+
+    return pattern(trie)
+
+
+def symbols(*symbols, p_space=char.space):
+    """
+    Parse any one of `symbols` followed by `p_space`, returning the symbol
+    matched. Where several match, the longest wins (e.g. `==` rather than
+    `=`), so unlike `symbol(a) | symbol(b) | ...` the order they are given
+    in doesn't matter and the cost doesn't grow with the number of symbols.
+
+    e.g.
+        p_operator = symbols('=', '==', '!=', '<', '<=', p_space=sc)
+    """
+    if not symbols or '' in symbols:
+        raise ValueError('symbols needs one or more non-empty symbols')
+    match = re.compile(_trie_pattern(symbols)).match
+    # fail just as `parsy.string_from(*symbols)` would
+    failure = parsy.Result(False, -1, None, -1, frozenset(symbols))
+
+    @parsy.Parser
+    def parser(stream, index):
+        found = match(stream, index)
+        if found is None:
+            return failure._replace(furthest=index)
+        return parsy.Result.success(found.end(), found.group())
+
+    return lexeme(parser, p_space=p_space)
+
+
+def skip_line_comment(*prefixes):
     """
     Given comment prefix this function returns a parser that skips line
     comments. Note that it stops just before the newline character but
     doesn't consume the newline. Newline is either supposed to be consumed by
     'space' parser or picked up manually.
+
+    Several prefixes may be given, e.g. `skip_line_comment('#', '//', ';')`,
+    and comments starting with any of them are skipped (with a single regex
+    match, rather than an alternative per prefix).
     """
-    return (
-        parsy.string(prefix).result('') << parsy.regex(r'[^\n]*')
-    ).desc('line-comment')
+    if not prefixes:
+        raise ValueError('skip_line_comment needs at least one prefix')
+    if len(prefixes) == 1:
+        prefix = prefixes[0]
+        pattern = re.escape(prefix) + r'[^\n]*'
+    else:
+        prefix = prefixes
+        pattern = '(?:{})[^\n]*'.format(
+            '|'.join(re.escape(p) for p in prefixes)
+        )
+    parser = parsy.regex(pattern).result('').desc('line-comment')
+    parser.prefix = prefix
+    parser.pattern = pattern
+    return parser
+
+
+def skip_block_comment(start, end):
+    """
+    `skip_block_comment(start, end)` skips non-nested block comment
+    starting with `start` and ending with `end`.
+
+    The closing `end` is found with a single `str.find` rather than by
+    stepping through the comment a character at a time.
+    """
+    start_len = len(start)
+    end_len = len(end)
+
+    @parsy.Parser
+    def parser(stream, index):
+        if not stream.startswith(start, index):
+            return parsy.Result.failure(index, start)
+        found = stream.find(end, index + start_len)
+        if found == -1:
+            return parsy.Result.failure(len(stream), end)
+        return parsy.Result.success(found + end_len, '')
+
+    parser = parser.desc('block-comment')
+    parser.pattern = r'{start}[\s\S]*?{end}'.format(
+        start=re.escape(start),
+        end=re.escape(end),
+    )
+    return parser
+
+
+def skip_block_comment_nested(start, end):
+    """
+    `skip_block_comment_nested(start, end)` skips possibly nested block
+    comment starting with `start` and ending with `end`.
+
+    Nesting depth is tracked with a counter in a single pass over the
+    comment, jumping between occurrences of `start` and `end` with
+    `str.find`. As in Megaparsec, a nested `start` is always taken as the
+    start of a comment, so the whole comment fails if it is never closed.
+    """
+    start_len = len(start)
+    end_len = len(end)
 
+    @parsy.Parser
+    def parser(stream, index):
+        if not stream.startswith(start, index):
+            return parsy.Result.failure(index, start)
+        pos = index + start_len
+        depth = 1
+        next_start = stream.find(start, pos)
+        next_end = stream.find(end, pos)
+        while True:
+            if next_end == -1:
+                return parsy.Result.failure(len(stream), end)
+            # (`end` wins when both could match at the same position)
+            if next_start != -1 and next_start < next_end:
+                depth += 1
+                pos = next_start + start_len
+            else:
+                depth -= 1
+                pos = next_end + end_len
+                if depth == 0:
+                    return parsy.Result.success(pos, '')
+            # only search again once we have moved past the last match
+            if next_start != -1 and next_start < pos:
+                next_start = stream.find(start, pos)
+            if next_end < pos:
+                next_end = stream.find(end, pos)
+
+    return parser.desc('block-comment')
 
-# TODO: skip_block_comment
+
+def _indentation(p_space_consumer):
+    """
+    Consume white space with `p_space_consumer` and return the column we
+    end up at.
+
+    If `p_space_consumer` was marked by `space()` as made only of white
+    space and line comments, this is looked up in the `IndentTable` for the
+    input (when starting from indentation or trailing white space, which is
+    where indentation checks usually happen) rather than parsed.
+
+    Otherwise the result is memoised in the `ParseState` for the input, per
+    space consumer and start offset, so that it's only parsed once however
+    many alternatives check the indentation at the same place.
+    """
+    @parsy.Parser
+    def parser(stream, index):
+        memo = parse_state(stream).indentation
+        key = (p_space_consumer, index)
+        found = memo.get(key)
+        if found is not None:
+            return found
+        result = p_space_consumer(stream, index)
+        if result.status:
+            result = parsy.Result.success(
+                result.index, column_at(stream, result.index)
+            ).aggregate(result)
+        memo[key] = result
+        return result
+
+    if not hasattr(p_space_consumer, 'layout_comment'):
+        return parser
+
+    comment_prefix = p_space_consumer.layout_comment
+    p_slow = parser
+
+    @parsy.Parser
+    def parser(stream, index):
+        if isinstance(stream, str):
+            found = indent_table(stream, comment_prefix).skip(index)
+            if found is not None:
+                end, col = found
+                return parsy.Result.success(end, col)
+        return p_slow(stream, index)
+
+    return parser
+
+
+def _incorrect_indent(description, index, result):
+    return parsy.Result.failure(index, description).aggregate(result)
+
+
+def _check_indent(p_indentation, operator, reference_level, stream, index):
+    """
+    Body of `indent_guard`, callable directly from the other combinators
+    in this module without building a new parser.
+    """
+    result = p_indentation(stream, index)
+    if not result.status:
+        return result
+    actual = result.value
+    if operator(actual, reference_level):
+        return result
+    return _incorrect_indent(
+        'indent_guard: {actual} {op} {ref}'.format(
+            actual=actual,
+            op=OPERATOR_MAP.get(operator, operator.__name__),
+            ref=reference_level,
+        ),
+        result.index,
+        result,
+    )
 
 
 def indent_guard(p_space_consumer, operator, reference_level):
@@ -98,24 +483,61 @@ def indent_guard(p_space_consumer, operator, reference_level):
         reference_level: column value (int index) of reference indent level
             to compare to
     """
-    @parsy.generate
-    def parser():
+    p_indentation = _indentation(p_space_consumer)
+
+    @parsy.Parser
+    def parser(stream, index):
         """
         Returns:
             int: current indent level
         """
-        yield p_space_consumer
-        _, actual = yield parsy.line_info
-        if operator(actual, reference_level):
-            return actual
-        else:
-            return parsy.fail(
-                'indent_guard: {actual} {op} {ref}'.format(
-                    actual=actual,
-                    op=OPERATOR_MAP.get(operator, operator.__name__),
-                    ref=reference_level,
-                )
+        return _check_indent(
+            p_indentation, operator, reference_level, stream, index
+        )
+
+    return parser
+
+
+@lru_cache(maxsize=1024)
+def _cached_indent_guard(p_space_consumer, operator, reference_level):
+    """
+    `indent_guard`, reusing the parser built last time for the same
+    (space consumer, operator, level).
+    """
+    return indent_guard(p_space_consumer, operator, reference_level)
+
+
+def _recorded(p):
+    """
+    Wrap a block parser so that, when the parse is being recorded for
+    incremental reparsing (see `megaparsy.incremental`), the span and
+    result of each block is kept and blocks unaffected by an edit are
+    reused instead of parsed again. Otherwise just runs `p`.
+    """
+    @parsy.Parser
+    def parser(stream, index):
+        state = parse_state(stream)
+        blocks = state.blocks
+        if blocks is None:
+            return p(stream, index)
+
+        key = (parser, index)
+        entry = blocks.get(key)
+        if entry is None and state.reuse is not None:
+            entry = state.reuse(parser, index)
+            if entry is not None:
+                blocks[key] = entry
+        if entry is not None:
+            return entry[0]
+
+        result = p(stream, index)
+        if result.status:
+            blocks[key] = (
+                result,
+                line_start_at(stream, index),
+                max(result.index, result.furthest),
             )
+        return result
 
     return parser
 
@@ -132,62 +554,138 @@ def non_indented(p_space_consumer, p_content):
       -> m a
     nonIndented sc p = indentGuard sc EQ pos1 *> p
     """
-    return indent_guard(p_space_consumer, operator.eq, 0) >> p_content
+    return _recorded(indent_guard(p_space_consumer, operator.eq, 0) >> p_content)
 
 
-def _indented_items(reference_level, next_level, p_space_consumer, p_indented_tokens):
+def _items(
+    reference_level,
+    next_level,
+    p_indentation,
+    p_indented_tokens,
+    stream,
+    index,
+    acc,
+    step,
+):
     """
     Grab indented items. This is a helper for `indent_block`, it's not a
     part of the public API.
 
+    Folds each item into `acc` with `acc = step(acc, item)` as soon as it
+    is parsed and returns a `Result` whose value is the final `acc`. Items
+    are parsed in a loop rather than by recursing once per item, so stack
+    depth stays constant however long the block is.
+
     Args:
         reference_level: column index to compare indent against
         next_level: column index of anticipated next indent level
-        p_space_consumer: e.g. `megaparsy.space()`
+        p_indentation: `_indentation(p_space_consumer)`, where
+            `p_space_consumer` is e.g. `megaparsy.space()`
         p_indented_tokens: parser to consume the indented items
     """
-    def closure():
-        """
-        Allows us to recursively use `parser`
-        """
-        @parsy.generate
-        def parser():
-            """
-            Returns:
-                List[str]
-            """
-            yield p_space_consumer
-            _, pos = yield parsy.line_info
-            done = yield (parsy.eof.result(True)).optional()
-            if done:
-                return []
-            else:
-                if pos <= reference_level:
-                    return []
-                elif pos == next_level:
-                    current_val = yield p_indented_tokens
-                    more_vals = yield closure()
-                    return [current_val] + more_vals
-                else:
-                    return parsy.fail(
-                        '_indented_items: {lvl} == {pos}'.format(
-                            lvl=next_level,
-                            pos=pos
-                        )
-                    )
+    result = None
+    while True:
+        # (resolving a dedent closing many levels at once costs one
+        # memoised lookup per enclosing block, see `_indentation`)
+        result = p_indentation(stream, index).aggregate(result)
+        if not result.status:
+            return result
+        index = result.index
+        pos = result.value
+        if index >= len(stream):
+            return parsy.Result.success(index, acc).aggregate(result)
+        # (as `eof.optional()` would, record that EOF was possible here)
+        result = result.aggregate(parsy.Result.failure(index, 'EOF'))
+        if pos <= reference_level:
+            return parsy.Result.success(index, acc).aggregate(result)
+        elif pos == next_level:
+            result = p_indented_tokens(stream, index).aggregate(result)
+            if not result.status:
+                return result
+            if result.index == index:
+                # it would succeed here again and again, forever
+                return parsy.Result.failure(
+                    index, 'indented item to consume input'
+                ).aggregate(result)
+            acc = step(acc, result.value)
+            index = result.index
+        else:
+            return _incorrect_indent(
+                '_indented_items: {lvl} == {pos}'.format(
+                    lvl=next_level,
+                    pos=pos
+                ),
+                index,
+                result,
+            )
 
-        return parser
 
-    return closure()
+def _return(value, stream, index, result):
+    """
+    Finish a parser with `value`, the way `parsy.generate` does: if the
+    value is itself a parser, it gets run at `index`.
+    """
+    if isinstance(value, parsy.Parser):
+        return value(stream, index).aggregate(result)
+    return parsy.Result.success(index, value).aggregate(result)
 
 
 IndentNone = namedtuple('IndentNone', ('val',))
 IndentMany = namedtuple('IndentMany', ('indent', 'f', 'p'))
 IndentSome = namedtuple('IndentSome', ('indent', 'f', 'p'))
-# where `f` is Callable[[List[str]], str] returning str result
+# where `f` is Callable[[List[str]], str] returning str result, or a `Fold`
+
+Fold = namedtuple('Fold', ('initial', 'step'))
+# Reducer form of `f`: each item is folded in as soon as it is parsed with
+# `acc = step(acc, item)`, starting from `initial`, and the final `acc` is
+# the result. The items are never collected into a list, e.g.
+#   IndentMany(None, Fold(0, lambda n, _: n + 1), p_item)
+# counts them. `step` may update `acc` in place and return it, but then
+# `initial` is shared by every parse of the block, so prefer immutable ones.
+
+
+def _identity(acc):
+    return acc
+
+
+def _append(acc, item):
+    acc.append(item)
+    return acc
 
 
-def indent_block(p_space_consumer, p_reference):
+def _reducer(f, sink=None):
+    """
+    The `Fold` that an `f` of `IndentMany`/`IndentSome` amounts to: the
+    plain `f` form collects the items in a list and calls `f` on it at the
+    end, and with a `sink` each item is passed to it and `f` gets `[]`.
+
+    Returns:
+        Tuple[Any, Callable[[Any, Any], Any], Callable[[Any], Any]]:
+            (initial, step, finish) where the block's result is
+            `finish(acc)`
+    """
+    if isinstance(f, Fold):
+        initial, fold_step = f
+        finish = _identity
+    else:
+        initial, fold_step = [], _append
+        finish = f
+    if sink is None:
+        step = fold_step
+    elif isinstance(f, Fold):
+        def step(acc, item):
+            sink(item)
+            return fold_step(acc, item)
+    else:
+        def step(acc, item):
+            sink(item)
+            return acc
+        initial = None
+        finish = lambda _: f([])  # noqa: E731
+    return initial, step, finish
+
+
+def indent_block(p_space_consumer, p_reference, sink=None):
     """
     Parse a “reference” token and a number of other tokens that have
     greater (but the same) level of indentation than that of “reference”
@@ -203,6 +701,13 @@ def indent_block(p_space_consumer, p_reference):
         p_reference: parser which should return an instance of one of
             IndentNone | IndentMany | IndentSome
             (return instance e.g. by using `p.result()` when `p` matches)
+        sink: optional callback, to stream the indented items instead of
+            collecting them. Each item is passed to `sink(item)` as soon as
+            it has been parsed and `f` is called with an empty list at the
+            end of the block (or, if `f` is a `Fold`, the items are also
+            folded into its result). NOTE: items are delivered as they are parsed,
+            so if the block fails later on (or is backtracked over) `sink`
+            will already have seen some of its items.
 
     data IndentOpt m a b
       = IndentNone a
@@ -238,8 +743,10 @@ def indent_block(p_space_consumer, p_reference):
           xs  <- indentedItems ref lvl sc p
           f (x:xs)
     """
-    @parsy.generate
-    def parser():
+    p_indentation = _indentation(p_space_consumer)
+
+    @parsy.Parser
+    def parser(stream, index):
         """
         Returns:
             List[str]
@@ -248,60 +755,114 @@ def indent_block(p_space_consumer, p_reference):
             TypeError: if `p_reference` does not return one of
                 IndentNone | IndentMany | IndentSome
         """
-        yield p_space_consumer
-        _, ref_level = yield parsy.line_info
-        indent_opt = yield p_reference
+        result = p_indentation(stream, index)
+        if not result.status:
+            return result
+        index = result.index
+        ref_level = result.value
+        result = p_reference(stream, index).aggregate(result)
+        if not result.status:
+            return result
+        index = result.index
+        indent_opt = result.value
 
         if isinstance(indent_opt, IndentNone):
             # Parse no indented tokens, just return the value
-            return p_space_consumer.result(indent_opt.val)
+            sc_result = p_space_consumer(stream, index)
+            if not sc_result.status:
+                return sc_result.aggregate(result)
+            return parsy.Result.success(sc_result.index, indent_opt.val)\
+                .aggregate(sc_result)\
+                .aggregate(result)
 
         elif isinstance(indent_opt, IndentMany):
             # Parse none-or-many indented tokens, use given indentation
             # level (if `None`, use level of the first indented token)
             maybe_indent, f, p = indent_opt
-            p_indent_guard = indent_guard(p_space_consumer, operator.gt, ref_level)
-            maybe_lvl = yield try_(char.eol >> p_indent_guard).optional()
-            done = yield (parsy.eof.result(True)).optional()
-            if not done and maybe_lvl is not None:
+            initial, step, finish = _reducer(f, sink)
+            # i.e. `try_(char.eol >> indent_guard(...)).optional()`
+            lvl_result = char.eol(stream, index)
+            if lvl_result.status:
+                lvl_result = _check_indent(
+                    p_indentation, operator.gt, ref_level, stream, lvl_result.index
+                ).aggregate(lvl_result)
+            result = lvl_result.aggregate(result)
+            if lvl_result.status:
+                maybe_lvl = lvl_result.value
+                index = lvl_result.index
+            else:
+                maybe_lvl = ''
+            done = index >= len(stream)
+            if not done:
+                result = result.aggregate(parsy.Result.failure(index, 'EOF'))
                 next_level = from_maybe(maybe_lvl, maybe_indent)
-                vals = yield _indented_items(
-                    ref_level, next_level, p_space_consumer, p
+                result = _items(
+                    ref_level, next_level, p_indentation, p,
+                    stream, index, initial, step,
+                ).aggregate(result)
+                if not result.status:
+                    return result
+                return _return(
+                    finish(result.value), stream, result.index, result
                 )
-                return f(vals)
             else:
-                return p_space_consumer.result(f([]))
+                return (p_space_consumer.result(finish(initial)))(
+                    stream, index
+                ).aggregate(result)
 
         elif isinstance(indent_opt, IndentSome):
             # Just like `IndentMany`, but requires at least one indented token
             # to be present
             maybe_indent, f, p = indent_opt
-            p_indent_guard = indent_guard(p_space_consumer, operator.gt, ref_level)
-            pos = yield char.eol >> p_indent_guard
+            initial, step, finish = _reducer(f, sink)
+            result = char.eol(stream, index).aggregate(result)
+            if not result.status:
+                return result
+            result = _check_indent(
+                p_indentation, operator.gt, ref_level, stream, result.index
+            ).aggregate(result)
+            if not result.status:
+                return result
+            index = result.index
+            pos = result.value
             lvl = from_maybe(pos, maybe_indent)
             if pos <= ref_level:
-                parsy.fail(
+                return _incorrect_indent(
                     'indent_block: {pos} > {ref}'.format(
                         ref=ref_level,
                         pos=pos,
-                    )
+                    ),
+                    index,
+                    result,
                 )
             elif pos == lvl:
-                current_val = yield p
-                more_vals = yield _indented_items(ref_level, lvl, p_space_consumer, p)
-                return f([current_val] + more_vals)
+                result = p(stream, index).aggregate(result)
+                if not result.status:
+                    return result
+                acc = step(initial, result.value)
+                result = _items(
+                    ref_level, lvl, p_indentation, p,
+                    stream, result.index, acc, step,
+                ).aggregate(result)
+                if not result.status:
+                    return result
+                return _return(
+                    finish(result.value), stream, result.index, result
+                )
             else:
-                parsy.fail(
+                return _incorrect_indent(
                     'indent_block: {lvl} == {pos}'.format(
                         lvl=lvl,
                         pos=pos,
-                    )
+                    ),
+                    index,
+                    result,
                 )
 
         else:
             raise TypeError('Must be one of IndentNone|IndentMany|IndentSome')
 
-    return parser
+    return _recorded(parser)
 
 
 def line_fold(p_space_consumer, callback):
@@ -327,14 +888,288 @@ def line_fold(p_space_consumer, callback):
             return parser
 
         my_fold = line_fold(space(), mycallback)
+
+    The parser returned by `callback` is built once for each indentation
+    level the fold is found at and then reused, so `callback` should not
+    depend on anything but its argument.
     """
-    @parsy.generate
-    def parser():
-        yield p_space_consumer
-        _, current = yield parsy.line_info
-        sc_ = try_(
-            indent_guard(p_space_consumer, operator.gt, current).result('')
-        )
-        return callback(sc_) << p_space_consumer
+    p_indentation = _indentation(p_space_consumer)
+    folds = {}
+
+    @parsy.Parser
+    def parser(stream, index):
+        result = p_indentation(stream, index)
+        if not result.status:
+            return result
+        current = result.value
+        p_fold = folds.get(current)
+        if p_fold is None:
+            sc_ = try_(
+                _cached_indent_guard(p_space_consumer, operator.gt, current)
+                .result('')
+            )
+            p_fold = folds[current] = callback(sc_) << p_space_consumer
+        return p_fold(stream, result.index).aggregate(result)
+
+    return parser
+
+
+def _number(pattern, convert, description):
+    """
+    A parser matching `pattern` (a single regex match, rather than a
+    combinator per digit) and returning `convert(text)`.
+    """
+    match = re.compile(pattern).match
+
+    @parsy.Parser
+    def parser(stream, index):
+        found = match(stream, index)
+        if found is None:
+            return parsy.Result.failure(index, description)
+        return parsy.Result.success(found.end(), convert(found.group()))
+
+    parser.pattern = pattern
+    return parser
+
+
+# Parse an integer in decimal representation, according to the format of
+# integer literals described in the Haskell report. If you need to parse
+# signed integers, see `signed`.
+decimal = _number(r'[0-9]+', int, 'integer')
+
+# Parse an integer in binary representation. The binary number is expected
+# to be a non-empty sequence of zeroes "0" and ones "1", without a prefix,
+# which you can parse separately, e.g. `parsy.string('0b') >> binary`.
+binary = _number(r'[01]+', lambda s: int(s, 2), 'binary integer')
+
+# Parse an integer in octal representation, e.g. after a prefix `0o`.
+octal = _number(r'[0-7]+', lambda s: int(s, 8), 'octal integer')
+
+# Parse an integer in hexadecimal representation (upper or lower case
+# digits), e.g. after a prefix `0x`.
+hexadecimal = _number(
+    r'[0-9a-fA-F]+', lambda s: int(s, 16), 'hexadecimal integer'
+)
+
+# Parse a floating point value, i.e. a decimal followed by a fraction part
+# and/or an exponent part, e.g. "1.5", "1e10", "1.5e-3" (but not "1").
+float_ = _number(
+    r'[0-9]+(?:\.[0-9]+(?:[eE][+-]?[0-9]+)?|[eE][+-]?[0-9]+)',
+    float,
+    'floating point number',
+)
+
+# Parse a floating point number without loss of precision: like `float_`
+# but the fraction and exponent are both optional, and the value is a
+# `decimal.Decimal`, e.g. "1", "1.5", "1e10".
+scientific = _number(
+    r'[0-9]+(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?', Decimal, 'number'
+)
+
+
+def signed(p_space, p_number):
+    """
+    Parse a number which may be preceded by a sign, "+" or "-", with white
+    space between the sign and the number consumed by `p_space`. The value
+    returned by `p_number` is negated after a "-".
+
+    e.g.
+        p_integer = lexeme(signed(sc, decimal), sc)
+
+    signed :: (MonadParsec e s m, Num a)
+      => m ()              -- ^ How to consume white space after the sign
+      -> m a               -- ^ How to parse the number itself
+      -> m a               -- ^ Parser for signed numbers
+    signed spc p = option id (lexeme spc sign) <*> p
+      where
+        sign = (id <$ char '+') <|> (negate <$ char '-')
+    """
+    @parsy.Parser
+    def parser(stream, index):
+        sign = stream[index:index + 1]
+        if sign != '+' and sign != '-':
+            # (as `option` would, record that a sign was possible here)
+            return p_number(stream, index).aggregate(
+                parsy.Result.failure(index, 'sign')
+            )
+        result = p_space(stream, index + 1)
+        if not result.status:
+            return result
+        result = p_number(stream, result.index).aggregate(result)
+        if result.status and sign == '-':
+            return result._replace(value=-result.value)
+        return result
+
+    return parser
+
+
+_ESCAPE = re.compile(
+    r'\\(?:'
+    r'(x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8})'
+    r'|([0-7]{1,3})'
+    r'''|([\\'"abfnrtv]))?'''
+)
+
+_SIMPLE_ESCAPES = {
+    '\\': '\\',
+    "'": "'",
+    '"': '"',
+    'a': '\a',
+    'b': '\b',
+    'f': '\f',
+    'n': '\n',
+    'r': '\r',
+    't': '\t',
+    'v': '\v',
+}
+
+
+def _escaped_char(match):
+    """
+    Returns:
+        Optional[str]: the character an `_ESCAPE` match stands for, or
+            `None` if it isn't a valid escape sequence
+    """
+    code, octal_code, simple = match.groups()
+    if simple is not None:
+        return _SIMPLE_ESCAPES[simple]
+    if code is not None:
+        code_point = int(code[1:], 16)
+    elif octal_code is not None:
+        code_point = int(octal_code, 8)
+    else:
+        return None
+    if code_point > sys.maxunicode:
+        return None
+    return chr(code_point)
+
+
+def _decode_escapes(text, offset):
+    """
+    Replace the escape sequences in `text`, which starts at `offset` in the
+    input.
+
+    Returns:
+        Tuple[Optional[str], int]: (decoded text, -1), or (None, index in
+            the input of the first invalid escape sequence)
+    """
+    pieces = []
+    pos = 0
+    for match in _ESCAPE.finditer(text):
+        c = _escaped_char(match)
+        if c is None:
+            return None, offset + match.start()
+        pieces.append(text[pos:match.start()])
+        pieces.append(c)
+        pos = match.end()
+    pieces.append(text[pos:])
+    return ''.join(pieces), -1
+
+
+@parsy.Parser
+def char_literal(stream, index):
+    r"""
+    Parse a single character, which may be given as an escape sequence:
+    `\n`, `\t` etc., `\\`, `\'`, `\"`, octal `\ooo`, or hexadecimal `\xhh`,
+    `\uhhhh`, `\Uhhhhhhhh`, as in Python string literals. Quotes are left
+    for you to parse, e.g.
+
+        p_char = parsy.string("'") >> char_literal << parsy.string("'")
+
+    (Megaparsec's `charLiteral`, but with Python's escape sequences rather
+    than Haskell's.)
+    """
+    if index >= len(stream):
+        return parsy.Result.failure(index, 'literal character')
+    c = stream[index]
+    if c != '\\':
+        return parsy.Result.success(index + 1, c)
+    match = _ESCAPE.match(stream, index)
+    c = _escaped_char(match)
+    if c is None:
+        return parsy.Result.failure(index, 'escape sequence')
+    return parsy.Result.success(match.end(), c)
+
+
+def string_literal(quote='"'):
+    """
+    Parse a string literal between `quote`s, decoding any escape sequences
+    in it (see `char_literal`), and return its value.
+
+    The closing quote is found with a single regex match and escapes are
+    only decoded if the literal has a backslash in it, so this is much
+    quicker than `char_literal` repeated up to the closing quote.
+    The literal may span several lines. `quote` may be several characters
+    long, e.g. `string_literal("'''")` for Python's triple quoted strings.
+    """
+    if not quote:
+        raise ValueError('string_literal needs a quote')
+    q = re.escape(quote)
+    if len(quote) == 1:
+        body = r'[^{q}\\]*(?:\\[\s\S][^{q}\\]*)*'
+    else:
+        # (anything up to the first unescaped occurrence of `quote`)
+        body = r'(?:(?!{q})[^\\]|\\[\s\S])*'
+    match = re.compile(
+        r'{q}({body}){q}'.format(q=q, body=body.format(q=q))
+    ).match
+
+    @parsy.Parser
+    def parser(stream, index):
+        found = match(stream, index)
+        if found is None:
+            if stream.startswith(quote, index):
+                # unterminated
+                return parsy.Result.failure(len(stream), quote)
+            return parsy.Result.failure(index, 'string literal')
+        text = found.group(1)
+        if '\\' in text:
+            text, bad = _decode_escapes(text, found.start(1))
+            if text is None:
+                return parsy.Result.failure(bad, 'escape sequence')
+        return parsy.Result.success(found.end(), text)
+
+    return parser
+
+
+def identifier(pattern=r'[^\W\d]\w*', reserved=frozenset(), intern=False):
+    """
+    Parse an identifier matching `pattern`, which is not one of the
+    `reserved` words, and return it.
+
+    A reserved word is rejected with a set lookup after the identifier has
+    been matched, rather than by trying a `symbol()` for each keyword first.
+    Since the whole identifier is matched, keywords are not confused with
+    identifiers they are a prefix of (`iffy` is an identifier even if `if`
+    is reserved).
+
+    e.g.
+        p_name = lexeme(identifier(reserved={'if', 'else', 'while'}), sc)
+
+    Args:
+        pattern: regex for identifiers, by default letters, digits and
+            underscores not starting with a digit
+        reserved: words which are not identifiers
+        intern: if true, the identifiers returned are `sys.intern`ed, so
+            that repeated names share one string
+    """
+    match = re.compile(pattern).match
+    reserved = frozenset(reserved)
+    convert = sys.intern if intern else None
+
+    @parsy.Parser
+    def parser(stream, index):
+        found = match(stream, index)
+        if found is None:
+            return parsy.Result.failure(index, 'identifier')
+        name = found.group()
+        if name in reserved:
+            return parsy.Result.failure(
+                index, 'identifier ({!r} is reserved)'.format(name)
+            )
+        if convert is not None:
+            name = convert(name)
+        return parsy.Result.success(found.end(), name)
 
+    parser.pattern = pattern
     return parser
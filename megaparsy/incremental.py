@@ -0,0 +1,163 @@
+"""
+Incremental reparsing of indentation-sensitive documents after an edit.
+
+While parsing, `indent_block` and `non_indented` record the span and
+result of every block they parse. After an edit the document is parsed
+again from the top, but any block whose text (and the text it looked
+at around it) was not touched by the edit is reused from the previous
+parse, shifted to its new position, instead of being parsed again. So
+only the blocks enclosing the edit are actually reparsed, and for those
+the cost is in their own lines plus one lookup per reused child.
+
+    tree = incremental.parse(parser, text)
+    tree = incremental.reparse(tree, offset, removed, inserted)
+    tree.value
+
+Since reused blocks are not run again, parsers should not have side
+effects (e.g. an `indent_block` `sink`) when parsed incrementally.
+"""
+from collections import namedtuple
+
+from megaparsy.state import parse_state
+
+
+Edit = namedtuple('Edit', ('offset', 'removed', 'inserted'))
+
+
+class ParseTree(object):
+    """
+    Result of an incremental parse.
+
+    Attributes:
+        parser: the parser used
+        stream: the parsed text
+        value: the parse result
+        blocks: recorded blocks, mapping `(block parser, index)` to
+            `(result, examined_start, examined_end)`
+    """
+
+    __slots__ = ('parser', 'stream', 'value', 'blocks')
+
+    def __init__(self, parser, stream, value, blocks):
+        self.parser = parser
+        self.stream = stream
+        self.value = value
+        self.blocks = blocks
+
+    def spans(self):
+        """
+        Returns:
+            List[Tuple[int, int]]: sorted (start, end) offsets of the
+                recorded blocks
+        """
+        return sorted({
+            (index, entry[0].index)
+            for (_, index), entry in self.blocks.items()
+        })
+
+
+def _parse(parser, stream, reuse=None):
+    state = parse_state(stream)
+    blocks = {}
+    state.blocks = blocks
+    state.reuse = reuse
+    try:
+        value = parser.parse(stream)
+    finally:
+        state.blocks = None
+        state.reuse = None
+    return ParseTree(parser, stream, value, blocks)
+
+
+def parse(parser, stream):
+    """
+    Parse `stream` with `parser`, recording the blocks in it.
+
+    Raises:
+        parsy.ParseError
+    """
+    return _parse(parser, stream)
+
+
+def _shift(entry, delta):
+    result, examined_start, examined_end = entry
+    return (
+        result._replace(
+            index=result.index + delta,
+            furthest=result.furthest + delta if result.furthest >= 0 else -1,
+        ),
+        examined_start + delta,
+        examined_end + delta,
+    )
+
+
+def _reuse(blocks, edit):
+    """
+    Make the `ParseState.reuse` callback for reparsing after `edit`.
+
+    A block from the previous parse can be reused if everything it looked
+    at, from the start of its first line to the furthest point it read, is
+    entirely before or entirely after the edited text.
+    """
+    offset, removed, inserted = edit
+    edit_end = offset + removed
+    delta = len(inserted) - removed
+
+    def reuse(parser, index):
+        """
+        Args:
+            index: position in the edited text
+        """
+        if index < offset:
+            entry = blocks.get((parser, index))
+            if entry is not None and entry[2] < offset:
+                return entry
+        elif index >= offset + len(inserted):
+            entry = blocks.get((parser, index - delta))
+            if entry is not None and entry[1] > edit_end:
+                return _shift(entry, delta)
+        return None
+
+    return reuse
+
+
+def apply_edit(stream, offset, removed, inserted):
+    return stream[:offset] + inserted + stream[offset + removed:]
+
+
+def reparse(tree, offset, removed, inserted):
+    """
+    Parse the text of `tree` after replacing `removed` characters at
+    `offset` with `inserted`, reusing all blocks the edit didn't touch.
+
+    Returns:
+        ParseTree
+
+    Raises:
+        parsy.ParseError: if the edited text does not parse (`tree` is
+            left unchanged, so further edits can still be applied to it)
+    """
+    edit = Edit(offset, removed, inserted)
+    stream = apply_edit(tree.stream, *edit)
+    new_tree = _parse(tree.parser, stream, _reuse(tree.blocks, edit))
+    _carry_over(tree.blocks, new_tree.blocks, edit)
+    return new_tree
+
+
+def _carry_over(old_blocks, new_blocks, edit):
+    """
+    Blocks nested inside reused blocks weren't looked up this time, so
+    they aren't in `new_blocks`. Copy across every recorded block still
+    valid after `edit`, so that a later edit inside a reused block only
+    has to reparse the innermost block around it.
+    """
+    offset, removed, inserted = edit
+    edit_end = offset + removed
+    delta = len(inserted) - removed
+    for (parser, index), entry in old_blocks.items():
+        if entry[2] < offset:
+            new_blocks.setdefault((parser, index), entry)
+        elif entry[1] > edit_end:
+            key = (parser, index + delta)
+            if key not in new_blocks:
+                new_blocks[key] = _shift(entry, delta)
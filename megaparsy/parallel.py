@@ -0,0 +1,143 @@
+"""
+Parse a long sequence of top-level (`non_indented`) constructs in parallel.
+
+Each construct starts on a line at column 0, so the input can be split
+there cheaply and the pieces parsed independently in separate processes.
+"""
+import importlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain
+
+import parsy
+
+
+@lru_cache(maxsize=None)
+def _resolve(parser_ref):
+    """
+    Args:
+        parser_ref: "package.module:attribute" reference to a parser
+    """
+    module_name, _, attr = parser_ref.partition(':')
+    obj = importlib.import_module(module_name)
+    for name in attr.split('.'):
+        obj = getattr(obj, name)
+    return obj
+
+
+def split_blocks(stream, line_comment=None):
+    """
+    Find the offsets of lines starting at column 0, i.e. where each
+    top-level construct begins. Blank lines, and lines holding only a
+    comment if `line_comment` prefix is given, don't start a construct.
+
+    The first construct is taken to start at 0, so that any leading white
+    space or comments go along with it.
+
+    Returns:
+        List[int]
+    """
+    if line_comment:
+        pattern = r'^(?!\s|{})'.format(re.escape(line_comment))
+    else:
+        pattern = r'^(?!\s)'
+    starts = [
+        match.start() for match in re.finditer(pattern, stream, re.MULTILINE)
+        if match.start() < len(stream)
+    ]
+    if starts:
+        starts[0] = 0
+    else:
+        starts = [0]
+    return starts
+
+
+def _parse_chunks(parser_ref, chunks):
+    """
+    Runs in the worker process. ParseError doesn't survive pickling, so
+    failures are sent back as (expected, index) instead.
+
+    Returns:
+        Tuple[bool, Union[List[Any], Tuple[int, FrozenSet[str], int]]]:
+            (True, results) or (False, (chunk number, expected, index))
+    """
+    parser = _resolve(parser_ref)
+    results = []
+    for i, chunk in enumerate(chunks):
+        try:
+            results.append(parser.parse(chunk))
+        except parsy.ParseError as e:
+            return False, (i, e.expected, e.index)
+    return True, results
+
+
+def _batches(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def parse_blocks(
+    parser_ref,
+    stream,
+    line_comment=None,
+    max_workers=None,
+    batch_size=None,
+    executor=None,
+):
+    """
+    Split `stream` into top-level constructs (see `split_blocks`), parse
+    each of them with the parser referred to by `parser_ref` across a
+    process pool and return the list of results, in input order.
+
+    Parsers are closures which can't be pickled, so the parser is passed by
+    reference and imported in each worker, e.g.:
+
+        parse_blocks('mylang.grammar:p_item_list', text, line_comment='#')
+
+    where `p_item_list` parses *one* construct, typically something wrapped
+    in `non_indented(...)`.
+
+    Args:
+        parser_ref: "package.module:attribute" reference to a parser
+        stream: the input text
+        line_comment: prefix of comments which may appear at column 0
+            without starting a new construct
+        max_workers: passed to `ProcessPoolExecutor`
+        batch_size: number of constructs sent to a worker at a time
+            (by default the work is split into a few batches per worker,
+            taking `max_workers` or else the number of CPUs as the number
+            of workers)
+        executor: use this `concurrent.futures.Executor` instead of
+            creating a process pool, e.g. a `ThreadPoolExecutor` (parsers
+            can be run from several threads at once)
+
+    Raises:
+        parsy.ParseError: at the position of the first failing construct,
+            relative to the whole of `stream`
+    """
+    starts = split_blocks(stream, line_comment)
+    bounds = list(zip(starts, starts[1:] + [len(stream)]))
+    chunks = [stream[start:end] for start, end in bounds]
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        if batch_size is None:
+            workers = max_workers or os.cpu_count() or 1
+            batch_size = max(1, len(chunks) // (workers * 4))
+        batches = _batches(chunks, batch_size)
+        outcomes = list(executor.map(
+            _parse_chunks, [parser_ref] * len(batches), batches
+        ))
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    for batch_no, (ok, value) in enumerate(outcomes):
+        if not ok:
+            i, expected, index = value
+            start, _ = bounds[batch_no * batch_size + i]
+            raise parsy.ParseError(expected, stream, start + index)
+    return list(chain.from_iterable(value for _, value in outcomes))
@@ -0,0 +1,315 @@
+import re
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+
+import parsy
+
+
+# how many distinct input streams we keep indexes for at once, per thread
+# (one per nested/interleaved parse is typical, so this can stay small)
+CACHE_SIZE = 4
+
+
+class StreamCache(threading.local):
+    """
+    Most recently used objects built for input streams, see `_cached`.
+
+    Each thread has its own entries, so parses running in different
+    threads at the same time don't evict (or share the mutable per-parse
+    state of) each other's streams.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()
+
+
+_cache = StreamCache()
+
+
+class LineIndex(object):
+    """
+    Offsets of the start of every line in `stream`, so that line/column
+    for any index can be found with a bisect instead of `parsy.line_info`
+    counting newlines from the start of the input each time.
+    """
+
+    __slots__ = ('line_starts',)
+
+    def __init__(self, stream):
+        line_starts = [0]
+        find = stream.find
+        pos = find('\n')
+        while pos != -1:
+            line_starts.append(pos + 1)
+            pos = find('\n', pos + 1)
+        self.line_starts = line_starts
+
+    def line(self, index):
+        return bisect_right(self.line_starts, index) - 1
+
+    def line_col(self, index):
+        """
+        Returns:
+            Tuple[int, int]: zero-indexed (line, column), same as
+                `parsy.line_info_at`
+        """
+        line = bisect_right(self.line_starts, index) - 1
+        return line, index - self.line_starts[line]
+
+    def column(self, index):
+        return self.line_col(index)[1]
+
+
+def _cached(cache, key, stream, factory):
+    """
+    Look up an index object for `stream` in the `StreamCache` `cache` (for
+    the current thread), making it with
+    `factory()` if it isn't there. Entries hold on to their stream so that
+    the identity check can't be fooled by a recycled `id()`.
+    """
+    entries = cache.entries
+    cached = entries.get(key)
+    if cached is not None and cached[0] is stream:
+        entries.move_to_end(key)
+        return cached[1]
+
+    value = factory()
+    entries[key] = (stream, value)
+    if len(entries) > CACHE_SIZE:
+        entries.popitem(last=False)
+    return value
+
+
+def line_index(stream):
+    """
+    Get the `LineIndex` for `stream`, building it on first use.
+
+    Indexes are cached by identity of the input, so within a single
+    `parser.parse(stream)` call the index is only built once.
+    """
+    return _cached(_cache, id(stream), stream, lambda: LineIndex(stream))
+
+
+def line_col_at(stream, index):
+    """
+    Same as `parsy.line_info_at` but using the cached `LineIndex` for
+    `str` input.
+    """
+    if not isinstance(stream, str):
+        return parsy.line_info_at(stream, index)
+    return line_index(stream).line_col(index)
+
+
+def column_at(stream, index):
+    return line_col_at(stream, index)[1]
+
+
+def line_start_at(stream, index):
+    """
+    Offset of the start of the line containing `index`.
+    """
+    return index - column_at(stream, index)
+
+
+def _line_info(stream, index):
+    return parsy.Result.success(index, line_col_at(stream, index))
+
+
+def _column(stream, index):
+    return parsy.Result.success(index, column_at(stream, index))
+
+
+# drop-in replacement for `parsy.line_info`
+line_info = parsy.Parser(_line_info)
+
+# just the column part of `line_info`
+column = parsy.Parser(_column)
+
+
+class IndentTable(object):
+    """
+    For every line of `stream`: the offset of its first non-blank character
+    and whether the line is blank or holds only a line comment.
+
+    Lets us work out where a `space()` consumer made of plain white space
+    plus (optionally) `skip_line_comment(comment_prefix)` would stop, without
+    running it, whenever we start from indentation or trailing white space.
+    `comment_prefix` may be a tuple, for a comment with several prefixes.
+    """
+
+    __slots__ = (
+        'lines',
+        'length',
+        'first_offsets',
+        'content_ends',
+        'line_ends',
+        'comment_only',
+        'next_non_blank',
+    )
+
+    def __init__(self, stream, comment_prefix=None):
+        self.lines = line_index(stream)
+        self.length = len(stream)
+        line_starts = self.lines.line_starts
+        line_ends = line_starts[1:]
+        line_ends = [start - 1 for start in line_ends] + [len(stream)]
+
+        first_offsets = []
+        content_ends = []
+        comment_only = []
+        for start, end in zip(line_starts, line_ends):
+            text = stream[start:end]
+            stripped = text.lstrip()
+            first = end - len(stripped)
+            first_offsets.append(first)
+            content_ends.append(start + len(text.rstrip()))
+            comment_only.append(
+                bool(comment_prefix) and stripped.startswith(comment_prefix)
+            )
+
+        next_non_blank = [-1] * (len(line_starts) + 1)
+        for line in range(len(line_starts) - 1, -1, -1):
+            if first_offsets[line] < line_ends[line]:
+                next_non_blank[line] = line
+            else:
+                next_non_blank[line] = next_non_blank[line + 1]
+
+        self.first_offsets = first_offsets
+        self.content_ends = content_ends
+        self.line_ends = line_ends
+        self.comment_only = comment_only
+        self.next_non_blank = next_non_blank
+
+    def indent(self, line):
+        """
+        Returns:
+            Tuple[int, int]: offset and column of first non-blank char on
+                `line` (the end of the line, if it is blank)
+        """
+        offset = self.first_offsets[line]
+        return offset, offset - self.lines.line_starts[line]
+
+    def skip(self, index):
+        """
+        Where white space (including newlines) followed by an optional
+        line comment, consumed from `index`, ends.
+
+        Returns:
+            Optional[Tuple[int, int]]: offset and column we end up at, or
+                `None` if `index` is in the middle of a line's content (in
+                which case the space consumer itself has to be run)
+        """
+        line = self.lines.line(index)
+        if index <= self.first_offsets[line] < self.content_ends[line]:
+            target = line
+        elif index >= self.content_ends[line]:
+            target = self.next_non_blank[line + 1]
+        else:
+            return None
+
+        if target == -1:
+            return self.length, self.length - self.lines.line_starts[-1]
+        if self.comment_only[target]:
+            end = self.line_ends[target]
+            return end, end - self.lines.line_starts[target]
+        return self.indent(target)
+
+
+_table_cache = StreamCache()
+
+
+def indent_table(stream, comment_prefix=None):
+    """
+    Get the `IndentTable` for `stream`, building it on first use (cached
+    in the same way as `line_index`).
+    """
+    return _cached(
+        _table_cache,
+        (id(stream), comment_prefix),
+        stream,
+        lambda: IndentTable(stream, comment_prefix),
+    )
+
+
+class SkipTable(object):
+    """
+    For every offset of `stream`, where skipping any amount of white space
+    and comments from there ends, so that a `space(..., skip_table=True)`
+    consumer is an array lookup rather than a regex match.
+
+    Built in one pass: each run of white space and comments in the input is
+    matched once and its start is mapped to its end. Offsets inside a run
+    (e.g. in the middle of a comment) are only worked out if asked for,
+    any other offset is its own end.
+
+    Args:
+        space_pattern: regex for white space, which must match each of its
+            characters on their own (as `\\s*` or `( |\\t)+` do)
+        comment_patterns: regexes for comments
+    """
+
+    __slots__ = ('stream', 'run', 'ends')
+
+    def __init__(self, stream, space_pattern, comment_patterns=()):
+        # comments go first, as `space_pattern` may match the empty string
+        # and that would end the repetition before a comment
+        alternatives = '|'.join(
+            '(?:{})'.format(p) for p in comment_patterns + (space_pattern,)
+        )
+        self.stream = stream
+        self.run = re.compile('(?:{})*'.format(alternatives))
+
+        space = re.compile(space_pattern)
+        space_chars = sorted(
+            c for c in set(stream)
+            if space.match(c) is not None and space.match(c).end()
+        )
+        run_starts = ['(?:{})'.format(p) for p in comment_patterns]
+        if space_chars:
+            run_starts.append('[{}]'.format(re.escape(''.join(space_chars))))
+
+        ends = array('l', range(len(stream) + 1))
+        if run_starts:
+            search = re.compile('|'.join(run_starts)).search
+            match = self.run.match
+            pos = 0
+            found = search(stream, pos)
+            while found is not None:
+                start = found.start()
+                end = match(stream, start).end()
+                if end > start:
+                    ends[start] = end
+                    ends[start + 1:end] = array('l', [-1]) * (end - start - 1)
+                    pos = end
+                else:
+                    pos = start + 1
+                found = search(stream, pos)
+        self.ends = ends
+
+    def skip(self, index):
+        """
+        Returns:
+            int: offset after any white space and comments from `index`
+        """
+        end = self.ends[index]
+        if end == -1:
+            end = self.run.match(self.stream, index).end()
+        return end
+
+
+_skip_cache = StreamCache()
+
+
+def skip_table(stream, space_pattern, comment_patterns=()):
+    """
+    Get the `SkipTable` for `stream`, building it on first use (cached
+    in the same way as `line_index`).
+    """
+    return _cached(
+        _skip_cache,
+        (id(stream), space_pattern, comment_patterns),
+        stream,
+        lambda: SkipTable(stream, space_pattern, comment_patterns),
+    )
@@ -0,0 +1,49 @@
+"""
+Per-parse state for the indentation combinators.
+
+parsy parsers are plain functions of `(stream, index)`, so state which
+belongs to a parse is kept per input stream (by identity, and per thread,
+as for the indexes in `megaparsy.position`).
+
+The attributes are records and memos of facts about the input (what a
+parser returns at a given offset), which hold whichever way the parse
+goes, so nothing needs undoing on backtracking.
+"""
+from megaparsy.position import StreamCache, _cached
+
+
+class ParseState(object):
+    """
+    Attributes:
+        blocks: while recording (see `megaparsy.incremental`), maps
+            `(parser, index)` of each block parsed successfully to
+            `(result, examined_start, examined_end)`, otherwise `None`
+        reuse: while reparsing after an edit, `reuse(parser, index)`
+            returns a `blocks` entry from the previous parse that is still
+            valid at `index`, or `None`
+        indentation: memo of indentation lookups, mapping
+            `(p_space_consumer, index)` to the `Result` of consuming white
+            space from `index`, whose value is the column it ended at.
+            Alternatives tried at the same line start then each find their
+            indentation with one lookup.
+        skips: memo of `space()` consumers, mapping `(parser, index)` to
+            the `Result` of consuming white space and comments from `index`
+    """
+
+    __slots__ = ('blocks', 'reuse', 'indentation', 'skips')
+
+    def __init__(self):
+        self.blocks = None
+        self.reuse = None
+        self.indentation = {}
+        self.skips = {}
+
+
+_cache = StreamCache()
+
+
+def parse_state(stream):
+    """
+    Get the `ParseState` for `stream`.
+    """
+    return _cached(_cache, id(stream), stream, ParseState)
@@ -0,0 +1,102 @@
+"""
+Parse huge inputs made of top-level (`non_indented`) constructs without
+reading the whole input into memory.
+
+Parsers need the text they parse as a single `str`, but an indentation
+grammar never looks back past the start of the current top-level construct.
+So the input is read a line at a time and each construct is parsed as soon
+as the next one starts; only the text of the construct being read is held
+in memory at any time.
+"""
+import parsy
+
+
+class BlockParseError(parsy.ParseError):
+    """
+    A ParseError in one construct of a streamed input. `stream` and `index`
+    refer to the construct's text, `line_info()` to the whole input.
+
+    Attributes:
+        offset: offset of the start of the construct in the whole input
+        line: line number of the start of the construct in the whole input
+    """
+
+    def __init__(self, expected, stream, index, offset, line):
+        super().__init__(expected, stream, index)
+        self.offset = offset
+        self.line = line
+
+    def line_info(self):
+        line, col = parsy.line_info_at(self.stream, self.index)
+        return '{}:{}'.format(self.line + line, col)
+
+
+def _starts_block(line, line_comment):
+    return (
+        bool(line)
+        and not line[0].isspace()
+        and not (line_comment and line.startswith(line_comment))
+    )
+
+
+def iter_blocks(lines, line_comment=None):
+    """
+    Group `lines` into top-level constructs, as `megaparsy.parallel.
+    split_blocks` does for a string.
+
+    Args:
+        lines: iterable of lines including their line endings, e.g. an
+            open text file
+
+    Yields:
+        Tuple[int, int, str]: (offset, line number, text) of each construct
+    """
+    block = []
+    # (leading blank or comment lines go with the first construct)
+    started = False
+    offset = 0
+    line_no = 0
+    block_offset = 0
+    block_line = 0
+    for line in lines:
+        if _starts_block(line, line_comment):
+            if started:
+                yield block_offset, block_line, ''.join(block)
+                block = []
+                block_offset = offset
+                block_line = line_no
+            started = True
+        block.append(line)
+        offset += len(line)
+        line_no += 1
+    if block:
+        yield block_offset, block_line, ''.join(block)
+
+
+def iter_parse_blocks(parser, lines, line_comment=None):
+    """
+    Parse each top-level construct read from `lines` with `parser`,
+    yielding the results as they are parsed.
+
+    e.g.
+
+        with open(path) as f:
+            for item in iter_parse_blocks(p_item_list, f, '#'):
+                ...
+
+    Args:
+        parser: parses *one* construct, typically something wrapped
+            in `non_indented(...)`
+        lines: iterable of lines including their line endings, e.g. an
+            open text file
+        line_comment: prefix of comments which may appear at column 0
+            without starting a new construct
+
+    Raises:
+        BlockParseError: with `line_info()` relative to the whole input
+    """
+    for offset, line_no, text in iter_blocks(lines, line_comment):
+        try:
+            yield parser.parse(text)
+        except parsy.ParseError as e:
+            raise BlockParseError(e.expected, text, e.index, offset, line_no)
@@ -3,6 +3,8 @@ from functools import wraps
 
 import parsy
 
+from megaparsy.position import line_info
+
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +42,7 @@ def debug(p, label="", context=12):
     def wrapped(stream, index):
         left = stream[max(0, index - context): index]
         right = stream[index: index + context]
-        result = parsy.line_info(stream, index)
+        result = line_info(stream, index)
         line, col = result.value
         logger.debug(f"{label}({line}:{col})|{left}{CARET}{right}")
 
@@ -1,3 +1,4 @@
+from hypothesis import given, strategies as st
 import parsy
 import pytest
 
@@ -73,3 +74,52 @@ def test_space1_error(s):
     p = char.space1 + parsy.regex(r'.*')
     with pytest.raises(parsy.ParseError):
         p.parse(s)
+
+
+@given(st.text('01a2'), st.sampled_from(['01', {'0', '1'}, '10]^-\\']))
+def test_take_while(s, chars):
+    expected = parsy.test_char(lambda c: c in chars, 'bit').many().concat()
+    for p in (
+        char.take_while(chars),
+        char.take_while(lambda c: c in chars),
+    ):
+        assert p.parse_partial(s) == expected.parse_partial(s)
+
+
+@pytest.mark.parametrize('predicate', ['01', str.isdigit])
+@pytest.mark.parametrize('s,expected', [
+    ('01x', ('01', 'x')),
+    ('x', None),
+    ('', None),
+])
+def test_take_while1(predicate, s, expected):
+    p = char.take_while1(predicate)
+    if expected is None:
+        with pytest.raises(parsy.ParseError):
+            p.parse_partial(s)
+    else:
+        assert p.parse_partial(s) == expected
+
+
+@pytest.mark.parametrize('s,expected', [
+    ('abcd', ('abc', 'd')),
+    ('abc', ('abc', '')),
+    ('ab', None),
+])
+def test_take_p(s, expected):
+    p = char.take_p(3)
+    if expected is None:
+        with pytest.raises(parsy.ParseError):
+            p.parse_partial(s)
+    else:
+        assert p.parse_partial(s) == expected
+
+
+@pytest.mark.parametrize('count', [0, -2])
+def test_take_p_not_positive(count):
+    """
+    takes nothing rather than moving backwards
+    """
+    result = char.take_p(count)('abc', 2)
+    assert result.status
+    assert (result.index, result.value) == (2, '')
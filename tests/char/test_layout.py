@@ -0,0 +1,201 @@
+import parsy
+import pytest
+
+from megaparsy.char import layout
+from megaparsy.char.layout import (
+    DEDENT,
+    INDENT,
+    LINE,
+    NEWLINE,
+    indent_block,
+    line,
+    line_fold,
+    non_indented,
+    tokenize,
+)
+from megaparsy.char.lexer import (
+    IndentMany,
+    IndentNone,
+    IndentSome,
+    lexeme,
+    space,
+    skip_line_comment,
+)
+from megaparsy import char
+from megaparsy.control.applicative.combinators import between
+
+
+word = parsy.regex(r'[a-zA-Z0-9\-]+')
+
+sc = space(parsy.regex(r'( |\t)+').result(''), skip_line_comment('#'))
+
+scn = space(char.space1, skip_line_comment('#'))
+
+
+def types(tokens):
+    return [t.type for t in tokens]
+
+
+def test_tokenize():
+    s = "a\n  b\n\n    c  \n  # comment only\n  d\ne"
+    tokens = tokenize(s, line_comment='#')
+    assert types(tokens) == [
+        LINE, NEWLINE,
+        INDENT, LINE, NEWLINE,
+        INDENT, LINE, NEWLINE,
+        DEDENT, LINE, NEWLINE,
+        DEDENT, LINE, NEWLINE,
+    ]
+    lines = [t for t in tokens if t.type == LINE]
+    assert [t.value for t in lines] == ['a', 'b', 'c', 'd', 'e']
+    assert [t.column for t in lines] == [0, 2, 4, 2, 0]
+    assert [s[t.index] for t in lines] == ['a', 'b', 'c', 'd', 'e']
+
+
+def test_tokenize_closes_blocks_at_eof():
+    tokens = tokenize("a\n  b\n    c\n")
+    assert types(tokens)[-2:] == [DEDENT, DEDENT]
+    assert [t.value for t in tokens[-2:]] == [2, 0]
+
+
+def test_tokenize_bad_dedent():
+    with pytest.raises(parsy.ParseError) as e:
+        tokenize("a\n    b\n  c\n")
+    assert e.value.line_info() == '2:2'
+
+
+def test_non_indented():
+    p = non_indented(line(word))
+    assert layout.parse(p, "abc\n") == 'abc'
+    with pytest.raises(parsy.ParseError):
+        layout.parse(p, "  abc\n")
+
+
+def _item_list():
+    fold = line_fold(lexeme(word, scn).at_least(1).map(' '.join))
+    complex_item = indent_block(
+        line(lexeme(word, sc)).map(
+            lambda h: IndentMany(None, lambda v: (h, v), fold)
+        )
+    )
+    return non_indented(indent_block(
+        line(lexeme(word, sc)).map(
+            lambda h: IndentSome(None, lambda v: (h, v), complex_item)
+        )
+    ))
+
+
+def test_indent_block():
+    s = (
+        "first-chapter\n"
+        "  paragraph-one\n"
+        "      note-A # an important note here!\n"
+        "      note-B\n"
+        "  paragraph-two\n"
+        "    note-1\n"
+        "      continued\n"
+        "    note-2\n"
+        "  paragraph-three\n"
+        "second-chapter\n"
+        "  paragraph-four\n"
+    )
+    val = layout.parse(_item_list().many(), s, line_comment='#')
+    assert val == [
+        ('first-chapter', [
+            ('paragraph-one', ['note-A', 'note-B']),
+            ('paragraph-two', ['note-1 continued', 'note-2']),
+            ('paragraph-three', []),
+        ]),
+        ('second-chapter', [
+            ('paragraph-four', []),
+        ]),
+    ]
+
+
+def test_indent_block_none():
+    p = indent_block(line(word).map(IndentNone))
+    assert layout.parse(p, "abc\n") == 'abc'
+    with pytest.raises(parsy.ParseError):
+        layout.parse(p, "abc\n  def\n")
+
+
+def test_indent_block_some_requires_items():
+    p = indent_block(
+        line(word).map(lambda h: IndentSome(None, list, line(word)))
+    )
+    assert layout.parse(p, "a\n  b\n  c\n") == ['b', 'c']
+    with pytest.raises(parsy.ParseError):
+        layout.parse(p, "a\n")
+
+
+def test_indent_block_explicit_level():
+    p = indent_block(
+        line(word).map(lambda h: IndentMany(4, list, line(word)))
+    )
+    assert layout.parse(p, "a\n    b\n") == ['b']
+    with pytest.raises(parsy.ParseError) as e:
+        layout.parse(p, "a\n  b\n")
+    assert e.value.line_info() == '1:2'
+
+
+def test_line_error_position():
+    """
+    errors inside a line are reported where they are in the line
+    """
+    p = indent_block(
+        line(word).map(lambda h: IndentMany(None, list, line(word)))
+    )
+    with pytest.raises(parsy.ParseError) as e:
+        layout.parse(p, "a\n  b\n  cd!e\n")
+    assert e.value.line_info() == '2:4'
+
+
+BRACKETS = ('()', '[]', '{}')
+
+
+def test_tokenize_brackets():
+    s = (
+        "a = f(1,\n"
+        "  2,\n"
+        "      [3, {4:\n"
+        "5}])  # (\n"
+        "  b\n"
+    )
+    tokens = tokenize(s, '#', BRACKETS)
+    assert types(tokens) == [
+        LINE, NEWLINE,
+        INDENT, LINE, NEWLINE,
+        DEDENT,
+    ]
+    assert tokens[0].value == s[:s.index('  b')].rstrip('\n')
+    assert tokens[3].value == 'b'
+
+
+def test_tokenize_brackets_in_strings():
+    s = "a = ')'\n  b = (\n')'\n  )\nc\n"
+    tokens = tokenize(s, brackets=BRACKETS, quotes='\'"')
+    lines = [t.value for t in tokens if t.type == LINE]
+    assert lines == ["a = ')'", "b = (\n')'\n  )", 'c']
+    assert types(tokens).count(INDENT) == 1
+
+
+def test_brackets_with_between():
+    """
+    lines are joined inside brackets, so `between` can parse across
+    newlines with a space consumer that accepts them, regardless of the
+    indentation of the continuation lines
+    """
+    scn_ = space(char.space1)
+    number = lexeme(parsy.regex(r'\d+').map(int), scn_)
+    p_list = between(
+        lexeme(parsy.string('['), scn_),
+        lexeme(parsy.string(']'), scn_),
+        number.sep_by(lexeme(parsy.string(','), scn_)),
+    )
+    p_item = lexeme(word, sc)
+    p = indent_block(
+        line(p_item).map(lambda h: IndentMany(None, lambda v: (h, v), line(p_list)))
+    )
+    s = "numbers\n  [1,\n2,\n      3]\n  [4]\n"
+    val = layout.parse(p, s, brackets=BRACKETS)
+    assert val == ('numbers', [[1, 2, 3], [4]])
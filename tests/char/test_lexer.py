@@ -1,5 +1,6 @@
 import operator
 import re
+import time
 from functools import partial
 
 from hypothesis import given, strategies as st
@@ -12,11 +13,15 @@ from megaparsy.char.lexer import (
     symbol,
     indent_block,
     indent_guard,
+    Fold,
     IndentMany,
     IndentNone,
     IndentSome,
+    lexeme,
     line_fold,
     non_indented,
+    skip_block_comment,
+    skip_block_comment_nested,
     skip_line_comment,
 )
 
@@ -112,6 +117,159 @@ def test_skip_line_comment():
     assert val == "\n"
 
 
+@pytest.mark.parametrize('s', ['# a', '// b', '; c', '#', ';;'])
+def test_skip_line_comment_prefixes(s):
+    p = skip_line_comment('#', '//', ';') + parsy.string('\n')
+    assert p.parse(s + '\n') == '\n'
+
+
+def test_skip_line_comment_prefixes_fail():
+    p = skip_line_comment('#', '//', ';')
+    with pytest.raises(parsy.ParseError):
+        p.parse('/ x')
+    with pytest.raises(ValueError):
+        skip_line_comment()
+
+
+def test_space_line_comment_prefixes():
+    """
+    several prefixes still use the `IndentTable`
+    """
+    p_comment = skip_line_comment('#', '//')
+    scn_ = space(char.space1, p_comment)
+    assert scn_.layout_comment == ('#', '//')
+    # same thing, without the `IndentTable`
+    scn_slow = space(char.space1 | parsy.fail('space'), p_comment)
+    assert not hasattr(scn_slow, 'layout_comment')
+
+    s = '\n  # x\n    // y\n  {}\n'.format(symbol_a)
+    for index in range(len(s) + 1):
+        r = indent_guard(scn_, operator.ge, 0)(s, index)
+        r_slow = indent_guard(scn_slow, operator.ge, 0)(s, index)
+        assert (r.index, r.value) == (r_slow.index, r_slow.value)
+
+
+def _many_till(p, p_end):
+    """
+    Megaparsec's `manyTill`, for reference versions of the block comment
+    parsers which step through the comment one character at a time.
+    """
+    @parsy.generate
+    def parser():
+        while True:
+            done = yield p_end.optional()
+            if done is not None:
+                return ''
+            yield p
+
+    return parser
+
+
+def _reference_block_comment(start, end):
+    return parsy.string(start) >> _many_till(parsy.any_char, parsy.string(end))
+
+
+def _reference_block_comment_nested(start, end):
+    """
+    Megaparsec's `start >> manyTill (nested <|> anySingle) (string end)`,
+    one char at a time: there is no `try`, so once a nested `start` has
+    matched, failing to close it fails the whole comment
+    """
+    @parsy.Parser
+    def nested(stream, index):
+        if not stream.startswith(start, index):
+            return parsy.Result.failure(index, start)
+        index += len(start)
+        while True:
+            if stream.startswith(end, index):
+                return parsy.Result.success(index + len(end), '')
+            if stream.startswith(start, index):
+                result = nested(stream, index)
+                if not result.status:
+                    return result
+                index = result.index
+            elif index < len(stream):
+                index += 1
+            else:
+                return parsy.Result.failure(index, end)
+
+    return nested
+
+
+def test_skip_block_comment():
+    p = skip_block_comment('/*', '*/') + parsy.regex(r'.*')
+    assert p.parse("/* one\n /* two */ three */") == " three */"
+
+    with pytest.raises(parsy.ParseError):
+        p.parse("/* unclosed")
+
+
+def test_skip_block_comment_nested():
+    p = skip_block_comment_nested('/*', '*/') + parsy.regex(r'.*')
+    assert p.parse("/* one\n /* two */ three */ four") == " four"
+
+    with pytest.raises(parsy.ParseError):
+        p.parse("/* one /* two */ three")
+
+
+@pytest.mark.parametrize('make_parser,make_reference', [
+    (skip_block_comment, _reference_block_comment),
+    (skip_block_comment_nested, _reference_block_comment_nested),
+])
+@given(
+    s=st.text('{-}x', max_size=20),
+    delims=st.sampled_from([('{-', '-}'), ('{', '}'), ('{-', '}'), ('--', '-}')]),
+)
+def test_skip_block_comment_reference(make_parser, make_reference, s, delims):
+    """
+    consumes the same as stepping through the comment one char at a time
+    """
+    result = make_parser(*delims)(s, 0)
+    expected = make_reference(*delims)(s, 0)
+    assert result.status == expected.status
+    if result.status:
+        assert result.index == expected.index
+
+
+@pytest.mark.parametrize('s', ['{-{-}', '{- x{-}', '{- {- -}{-}'])
+def test_skip_block_comment_nested_unclosed(s):
+    """
+    a nested start that is never closed fails the whole comment
+    """
+    with pytest.raises(parsy.ParseError):
+        skip_block_comment_nested('{-', '-}').parse(s)
+
+
+@pytest.mark.parametrize('s', [
+    '{-' * 50000 + '-}',
+    '{-' * 34000 + '-}' * 16000,
+    '{-' + 'x-{-' * 25000,
+])
+def test_skip_block_comment_nested_linear(s):
+    """
+    unbalanced comments of ~10^5 chars fail in a single pass
+    """
+    started = time.perf_counter()
+    result = skip_block_comment_nested('{-', '-}')(s, 0)
+    assert not result.status
+    assert time.perf_counter() - started < 1
+
+
+def test_space_block_comment():
+    """
+    (fused into a single regex when not nested)
+    """
+    for p_block_comment in (
+        skip_block_comment('/*', '*/'),
+        skip_block_comment_nested('/*', '*/'),
+    ):
+        p = space(char.space1, skip_line_comment('//'), p_block_comment)
+        p = p + parsy.regex(r'.*')
+        assert p.parse("  /* block\n */x") == "x"
+        assert p.parse("  // line /* x */") == ""
+        assert p.parse("  /* unclosed") == "/* unclosed"
+
+
 @given(make_indent(symbol_a, 0))
 def test_non_indented(s):
     """
@@ -245,6 +403,28 @@ def test_indent_guard(lines):
         assert val == ''
 
 
+def test_indent_guard_memo():
+    """
+    alternatives guarding the indentation at the same place only consume
+    the white space once
+    """
+    calls = []
+
+    @parsy.Parser
+    def counting_space(stream, index):
+        calls.append(index)
+        return char.space1(stream, index)
+
+    p_sc = space(counting_space, skip_block_comment('/*', '*/'))
+    p = (
+        (indent_guard(p_sc, operator.eq, 4) >> symbol(symbol_a, sc))
+        | (indent_guard(p_sc, operator.eq, 2) >> symbol(symbol_b, sc))
+        | (indent_guard(p_sc, operator.gt, 0) >> symbol(symbol_c, sc))
+    )
+    assert p.parse('\n  /* x */' + symbol_c) == symbol_c
+    assert calls == [0]
+
+
 @st.composite
 def _make_block(draw):
     """
@@ -332,3 +512,151 @@ def test_indent_block(block):
                 (symbol_b, [symbol_c]),
             ]
         )
+
+
+@pytest.mark.parametrize('indent_opt', [IndentMany, IndentSome])
+def test_indent_block_many_items(indent_opt):
+    """
+    long blocks are parsed without recursing once per item
+    """
+    n = 10000
+    p = indent_block(
+        p_space_consumer=scn,
+        p_reference=symbol(symbol_a, sc).result(
+            indent_opt(None, len, symbol(symbol_b, sc))
+        )
+    )
+    s = symbol_a + '\n' + '  {}\n'.format(symbol_b) * n
+    val = p.parse(s)
+    assert val == n
+
+
+@pytest.mark.parametrize('indent_opt', [IndentMany, IndentSome])
+def test_indent_block_item_consumes_nothing(indent_opt):
+    """
+    an item parser succeeding without consuming input fails the block,
+    rather than looping forever
+    """
+    p = indent_block(
+        p_space_consumer=scn,
+        p_reference=symbol(symbol_a, sc).result(
+            indent_opt(None, list, parsy.regex(r'[0-9]*'))
+        )
+    )
+    with pytest.raises(parsy.ParseError) as e:
+        p.parse('{}\n  x\n'.format(symbol_a))
+    assert 'indented item to consume input' in e.value.expected
+
+
+def test_indent_block_some_wrong_indent():
+    """
+    `IndentSome` with an explicit indent level fails if the first item
+    is not at that level
+    """
+    p = indent_block(
+        p_space_consumer=scn,
+        p_reference=symbol(symbol_a, sc).result(
+            IndentSome(4, list, symbol(symbol_b, sc))
+        )
+    )
+    with pytest.raises(parsy.ParseError):
+        p.parse('{}\n  {}\n'.format(symbol_a, symbol_b))
+    assert p.parse('{}\n    {}\n'.format(symbol_a, symbol_b)) == [symbol_b]
+
+
+@pytest.mark.parametrize('indent_opt', [IndentMany, IndentSome])
+def test_indent_block_sink(indent_opt):
+    """
+    with a `sink` items are streamed to it rather than collected
+    """
+    items = []
+    p = indent_block(
+        p_space_consumer=scn,
+        p_reference=symbol(symbol_a, sc).result(
+            indent_opt(None, lambda l: (symbol_a, l), symbol(symbol_b, sc))
+        ),
+        sink=items.append,
+    )
+    s = symbol_a + '\n' + '  {}\n'.format(symbol_b) * 3
+    val = p.parse(s)
+    assert val == (symbol_a, [])
+    assert items == [symbol_b] * 3
+
+
+@pytest.mark.parametrize('indent_opt', [IndentMany, IndentSome])
+def test_indent_block_fold(indent_opt):
+    """
+    with a `Fold` items are reduced as they are parsed
+    """
+    p = indent_block(
+        p_space_consumer=scn,
+        p_reference=symbol(symbol_a, sc).result(
+            indent_opt(
+                None,
+                Fold(0, lambda n, item: n + len(item)),
+                symbol(symbol_b, sc),
+            )
+        ),
+    )
+    s = symbol_a + '\n' + '  {}\n'.format(symbol_b) * 3
+    assert p.parse(s) == 3 * len(symbol_b)
+    if indent_opt is IndentMany:
+        assert p.parse(symbol_a) == 0
+
+
+def test_indent_block_fold_sink():
+    """
+    a `sink` sees the items as well as the `Fold`
+    """
+    items = []
+    p = indent_block(
+        p_space_consumer=scn,
+        p_reference=symbol(symbol_a, sc).result(
+            IndentSome(None, Fold((), lambda t, item: t + (item,)),
+                       symbol(symbol_b, sc))
+        ),
+        sink=items.append,
+    )
+    s = symbol_a + '\n' + '  {}\n'.format(symbol_b) * 2
+    assert p.parse(s) == (symbol_b, symbol_b)
+    assert items == [symbol_b] * 2
+
+
+def test_line_fold_reuses_parsers():
+    """
+    the callback is only called once per indentation level, not once per
+    fold
+    """
+    calls = []
+
+    def callback(sc_):
+        calls.append(sc_)
+        return lexeme(parsy.regex(r'\w+'), sc_).at_least(1)
+
+    p = line_fold(scn, callback).many()
+    s = "a\n b\nc\n d\ne\n"
+    val = p.parse(s)
+    assert val == [['a', 'b'], ['c', 'd'], ['e']]
+    assert len(calls) == 1
+
+
+def test_indent_block_deep_dedent():
+    """
+    a dedent closing many levels at once
+    """
+    depth = 30
+
+    def nest(n):
+        if n == 0:
+            return symbol(symbol_a, sc)
+        return indent_block(
+            scn,
+            symbol(symbol_b, sc).result(
+                IndentSome(None, lambda l: l[0], nest(n - 1))
+            ),
+        )
+
+    lines = ['{}{}\n'.format(' ' * i, symbol_b) for i in range(depth)]
+    lines.append('{}{}\n'.format(' ' * depth, symbol_a))
+    p = nest(depth).many()
+    assert p.parse(''.join(lines) * 2) == [symbol_a, symbol_a]
@@ -1,7 +1,29 @@
+import json
+from decimal import Decimal
+
+from hypothesis import given, strategies as st
 import parsy
 import pytest
 
-from megaparsy.char.lexer import space, lexeme, symbol, skip_line_comment
+from megaparsy import char
+from megaparsy.char.lexer import (
+    binary,
+    char_literal,
+    decimal,
+    float_,
+    hexadecimal,
+    identifier,
+    octal,
+    scientific,
+    signed,
+    space,
+    lexeme,
+    symbol,
+    symbols,
+    skip_line_comment,
+    skip_regex,
+    string_literal,
+)
 
 
 @pytest.mark.parametrize('s', [
@@ -76,3 +98,240 @@ def test_symbol():
     s = "foo foo\nfoo "
     val = p.parse(s)
     assert val == ['foo', 'foo', 'foo']
+
+
+def _opaque(p):
+    """
+    Same parser, but without a `pattern` that `space()` could fuse
+    """
+    return p | parsy.fail('opaque')
+
+
+@given(st.text(' \t\n#/*x'), st.sampled_from(['#', '//']))
+def test_space_fused(s, prefix):
+    """
+    fusing regex-backed parts into one regex consumes exactly what the
+    parts would one after another
+    """
+    for p_space in (char.space, char.space1, skip_regex(r'( |\t)+')):
+        fused = space(p_space, skip_line_comment(prefix))
+        unfused = space(_opaque(p_space), _opaque(skip_line_comment(prefix)))
+        assert hasattr(fused, 'pattern')
+        assert not hasattr(unfused, 'pattern')
+        for index in range(len(s) + 1):
+            assert fused(s, index).index == unfused(s, index).index
+
+
+def test_space_pattern_string():
+    p = space(r'( |\t)+') + parsy.regex(r'.*')
+    assert p.parse(' \t x') == 'x'
+
+
+def test_space_skip_cache():
+    """
+    the same run of white space is only scanned once per input
+    """
+    calls = []
+
+    @parsy.Parser
+    def counting_space(stream, index):
+        calls.append(index)
+        return char.space1(stream, index)
+
+    scn = space(counting_space)
+    p = (symbol('a', scn) << scn << scn) + symbol('b', scn)
+    s = 'a  \n b'
+    assert p.parse(s) == 'ab'
+    assert calls == [1, 5, 6]
+    # a different input is scanned afresh
+    assert p.parse(''.join(['a', '  \n b'])) == 'ab'
+    assert calls == [1, 5, 6] * 2
+    # the memo is kept with the (bounded) per-input state, the parser
+    # itself doesn't hold on to the input
+    assert all(
+        cell.cell_contents is not s
+        for cell in scn.wrapped_fn.__closure__ or ()
+    )
+
+
+@given(
+    st.lists(st.text('=<>!a', min_size=1, max_size=4), min_size=1),
+    st.text('=<>!a ', max_size=6),
+)
+def test_symbols(syms, s):
+    """
+    same as trying the symbols longest first
+    """
+    p = symbols(*syms)
+    reference = parsy.alt(*(
+        symbol(sym) for sym in sorted(set(syms), key=len, reverse=True)
+    ))
+    result = p(s, 0)
+    expected = reference(s, 0)
+    assert result.status == expected.status
+    if result.status:
+        assert (result.index, result.value) == (expected.index, expected.value)
+
+
+def test_symbols_error():
+    with pytest.raises(parsy.ParseError) as e:
+        symbols('=', '==').parse('<')
+    assert e.value.expected == frozenset(['=', '=='])
+    with pytest.raises(ValueError):
+        symbols()
+
+
+@given(st.integers(min_value=0))
+def test_integers(n):
+    assert decimal.parse(str(n)) == n
+    assert binary.parse('{:b}'.format(n)) == n
+    assert octal.parse('{:o}'.format(n)) == n
+    assert hexadecimal.parse('{:x}'.format(n)) == n
+    assert hexadecimal.parse('{:X}'.format(n)) == n
+
+
+@pytest.mark.parametrize('s', ['1.5', '1e10', '1.5e-3', '0.25E+2', '007.0'])
+def test_float(s):
+    assert float_.parse(s) == float(s)
+    assert scientific.parse(s) == Decimal(s)
+
+
+@pytest.mark.parametrize('s,expected', [
+    ('1', ('1', '')),
+    ('1.', ('1', '.')),
+    ('1e', ('1', 'e')),
+    ('.5', None),
+])
+def test_scientific_partial(s, expected):
+    if expected is None:
+        with pytest.raises(parsy.ParseError):
+            scientific.parse_partial(s)
+    else:
+        value, rest = scientific.parse_partial(s)
+        assert (str(value), rest) == expected
+
+
+def test_float_needs_fraction_or_exponent():
+    with pytest.raises(parsy.ParseError):
+        float_.parse('1')
+
+
+@pytest.mark.parametrize('s,expected', [
+    ('12', 12),
+    ('+12', 12),
+    ('-12', -12),
+    ('- 12', -12),
+])
+def test_signed(s, expected):
+    assert signed(space(), decimal).parse(s) == expected
+
+
+def test_signed_error():
+    with pytest.raises(parsy.ParseError) as e:
+        signed(space(), decimal).parse('x')
+    assert e.value.expected == frozenset(['integer', 'sign'])
+    with pytest.raises(parsy.ParseError):
+        signed(space(), decimal).parse('-')
+
+
+@given(st.text(st.characters(
+    max_codepoint=0xFFFF, blacklist_categories=['Cs'],
+)))
+def test_string_literal(s):
+    """
+    decodes what Python and JSON escape
+    """
+    literal = repr(s)
+    assert string_literal(literal[0]).parse(literal) == s
+    assert string_literal().parse(json.dumps(s)) == s
+    assert string_literal().parse(json.dumps(s, ensure_ascii=False)) == s
+
+
+@pytest.mark.parametrize('s,index', [
+    (r'"abc', 4),
+    (r'"a\"', 4),
+    (r'"a\qb"', 2),
+    (r'"\x4"', 1),
+    (r'abc', 0),
+])
+def test_string_literal_error(s, index):
+    with pytest.raises(parsy.ParseError) as e:
+        string_literal().parse(s)
+    assert e.value.index == index
+
+
+@pytest.mark.parametrize('s,expected', [
+    ("'''a'b'''", "a'b"),
+    ("'''a''b'''", "a''b"),
+    ("'''a\\'''b'''", "a'''b"),
+    ("''''''", ''),
+])
+def test_string_literal_multichar_quote(s, expected):
+    assert string_literal("'''").parse(s) == expected
+
+
+def test_string_literal_empty_quote():
+    with pytest.raises(ValueError):
+        string_literal('')
+
+
+@pytest.mark.parametrize('s,expected', [
+    ('a', 'a'),
+    ('"', '"'),
+    (r'\n', '\n'),
+    (r'\'', "'"),
+    (r'\\', '\\'),
+    (r'\101', 'A'),
+    (r'\x41', 'A'),
+    (r'\U0001F600', '\U0001F600'),
+])
+def test_char_literal(s, expected):
+    assert char_literal.parse(s) == expected
+
+
+@pytest.mark.parametrize('s', ['', r'\q', r'\U00110000'])
+def test_char_literal_error(s):
+    with pytest.raises(parsy.ParseError):
+        char_literal.parse(s)
+
+
+@pytest.mark.parametrize('s,expected', [
+    ('foo', 'foo'),
+    ('_x1 rest', '_x1'),
+    ('iffy', 'iffy'),
+    ('été', 'été'),
+    ('if', None),
+    ('1x', None),
+])
+def test_identifier(s, expected):
+    p = identifier(reserved={'if', 'else'})
+    if expected is None:
+        with pytest.raises(parsy.ParseError):
+            p.parse_partial(s)
+    else:
+        assert p.parse_partial(s)[0] == expected
+
+
+def test_identifier_intern():
+    p = identifier(r'[a-z]+', intern=True)
+    a = p.parse(''.join(['na', 'me']))
+    b = p.parse(''.join(['nam', 'e']))
+    assert a is b
+
+
+@pytest.mark.parametrize('parts,s,rest', [
+    # global flags
+    ((skip_regex('(?i)x+'), skip_line_comment('#')), 'XxX#c\nz', '\nz'),
+    ((char.space1, skip_regex('(?i)x+')), ' X!', '!'),
+    # backreference, group numbers would shift
+    ((char.space1, skip_regex(r'(a)\1')), ' aa!', '!'),
+    # duplicate group names
+    ((skip_regex('(?P<n>a)'), skip_regex('(?P<n>b)')), 'ab!', '!'),
+])
+def test_space_not_fusable(parts, s, rest):
+    """
+    parts which wouldn't mean the same in one regex are run separately
+    """
+    p = space(*parts)
+    assert not hasattr(p, 'pattern')
+    assert p.parse_partial(s) == ('', rest)
@@ -1,5 +1,15 @@
 import parsy
 
+from megaparsy import char
+from megaparsy.char.lexer import (
+    IndentMany,
+    indent_block,
+    non_indented,
+    skip_line_comment,
+    skip_regex,
+    space,
+)
+
 
 def prs_(p):
     """
@@ -18,3 +28,53 @@ def prs_(p):
          -- ^ Result of parsing
     """
     return (p << parsy.eof).parse
+
+
+# A small indentation-sensitive grammar, shared by the tests of the modules
+# parsing whole documents block by block:
+#
+#   one
+#     a
+#     b
+#   two
+
+scn = space(char.space1, skip_line_comment('#'))
+
+sc = space(skip_regex(r'( |\t)+'))
+
+# every word parsed, to check what was (re)parsed
+calls = []
+
+
+def _word(v):
+    calls.append(v)
+    return v
+
+
+word = parsy.regex(r'[a-z0-9]+').map(_word) << sc
+
+
+def block(item):
+    """
+    A header word, followed by any number of indented `item`s.
+    """
+    return indent_block(
+        scn,
+        word.map(lambda header: IndentMany(None, lambda l: (header, l), item)),
+    )
+
+
+p_block = non_indented(scn, block(word))
+
+TEXT = (
+    "\n"
+    "one\n"
+    "  a\n"
+    "  b\n"
+    "\n"
+    "two\n"
+    "three\n"
+    "  c\n"
+)
+
+EXPECTED = [('one', ['a', 'b']), ('two', []), ('three', ['c'])]
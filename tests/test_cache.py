@@ -0,0 +1,88 @@
+import os
+
+import parsy
+import pytest
+
+from megaparsy.cache import BlockCache
+from tests.helpers import EXPECTED, TEXT, calls, p_block
+
+
+def cache_files(directory):
+    return [name for name in os.listdir(directory) if name.endswith('.block')]
+
+
+def test_parse_blocks(tmp_path):
+    cache = BlockCache(str(tmp_path), 'v1')
+    del calls[:]
+    assert cache.parse_blocks(p_block, TEXT) == EXPECTED
+    assert len(calls) == 6
+    assert len(cache_files(str(tmp_path))) == 3
+
+    # unchanged blocks are loaded, not parsed
+    del calls[:]
+    text = TEXT.replace('two', 'four')
+    assert cache.parse_blocks(p_block, text) == [
+        ('one', ['a', 'b']), ('four', []), ('three', ['c'])
+    ]
+    assert calls == ['four']
+
+
+def test_fingerprint(tmp_path):
+    BlockCache(str(tmp_path), 'v1').parse_blocks(p_block, TEXT)
+    del calls[:]
+    assert BlockCache(str(tmp_path), 'v2').parse_blocks(p_block, TEXT) == EXPECTED
+    assert len(calls) == 6
+
+
+def test_corrupt_entry(tmp_path):
+    cache = BlockCache(str(tmp_path), 'v1')
+    cache.parse_blocks(p_block, TEXT)
+    for name in cache_files(str(tmp_path)):
+        with open(os.path.join(str(tmp_path), name), 'wb') as f:
+            f.write(b'not a pickle')
+    assert cache.parse_blocks(p_block, TEXT) == EXPECTED
+
+
+@pytest.mark.parametrize('data', [
+    # a class from a module which no longer exists
+    b'cno_such_module_here\nThing\n.',
+    # ...or which no longer has it
+    b'cos\nno_such_thing_here\n.',
+])
+def test_stale_entry(tmp_path, data):
+    cache = BlockCache(str(tmp_path), 'v1')
+    cache.parse_blocks(p_block, TEXT)
+    for name in cache_files(str(tmp_path)):
+        with open(os.path.join(str(tmp_path), name), 'wb') as f:
+            f.write(data)
+    del calls[:]
+    assert cache.parse_blocks(p_block, TEXT) == EXPECTED
+    assert len(calls) == 6
+
+
+def test_evict(tmp_path):
+    directory = str(tmp_path)
+    cache = BlockCache(directory, 'v1')
+    cache.parse_blocks(p_block, TEXT)
+    paths = sorted(
+        os.path.join(directory, name) for name in cache_files(directory)
+    )
+    sizes = [os.path.getsize(path) for path in paths]
+    for i, path in enumerate(paths):
+        os.utime(path, (1000 + i, 1000 + i))
+
+    cache.max_size = sum(sizes) - 1
+    cache.evict()
+    # just the oldest entry is removed
+    assert not os.path.exists(paths[0])
+    assert all(os.path.exists(path) for path in paths[1:])
+
+
+def test_error_position(tmp_path):
+    cache = BlockCache(str(tmp_path), 'v1')
+    s = TEXT + "four\n  d!\n"
+    with pytest.raises(parsy.ParseError) as e:
+        cache.parse_blocks(p_block, s)
+    assert e.value.line_info() == '9:3'
+    # blocks parsed before the error are cached all the same
+    assert len(cache_files(str(tmp_path))) == 3
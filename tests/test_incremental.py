@@ -0,0 +1,94 @@
+import random
+
+import parsy
+import pytest
+
+from megaparsy import incremental
+from megaparsy.char.lexer import non_indented
+from tests.helpers import block, calls, scn, word
+
+
+p_doc = non_indented(scn, block(block(word))).many()
+
+
+def make_doc(n):
+    lines = []
+    for i in range(n):
+        lines.append('top{}'.format(i))
+        for j in range(3):
+            lines.append('  mid{}'.format(j))
+            for k in range(3):
+                lines.append('    leaf{}'.format(k))
+    return '\n'.join(lines) + '\n'
+
+
+def test_reparse_matches_full_parse():
+    s = make_doc(5)
+    tree = incremental.parse(p_doc, s)
+    assert tree.value == p_doc.parse(s)
+
+    offset = s.index('leaf1', s.index('top3'))
+    tree = incremental.reparse(tree, offset, len('leaf1'), 'changed')
+    assert tree.value == p_doc.parse(tree.stream)
+    assert tree.value[3][1][0][1][1] == 'changed'
+
+
+def test_reparse_only_parses_edited_block():
+    s = make_doc(50)
+    tree = incremental.parse(p_doc, s)
+
+    offset = s.index('leaf1', s.index('top20'))
+    del calls[:]
+    tree = incremental.reparse(tree, offset, len('leaf1'), 'edited')
+    # the edited leaf, its siblings, and the headers enclosing it
+    assert 'edited' in calls
+    assert len(calls) < 10
+
+    # and again, inside a block that was reused last time
+    offset = tree.stream.index('leaf0', tree.stream.index('top40'))
+    del calls[:]
+    tree = incremental.reparse(tree, offset, 0, 'x')
+    assert 'xleaf0' in calls
+    assert len(calls) < 10
+    assert tree.value == p_doc.parse(tree.stream)
+
+
+def test_reparse_structure_change():
+    s = make_doc(3)
+    tree = incremental.parse(p_doc, s)
+
+    # dedent a leaf, so that it becomes a sibling of its parent
+    offset = s.index('    leaf2', s.index('top1'))
+    tree = incremental.reparse(tree, offset, 2, '')
+    assert tree.value == p_doc.parse(tree.stream)
+
+
+def test_reparse_error():
+    s = make_doc(3)
+    tree = incremental.parse(p_doc, s)
+    offset = s.index('leaf2')
+    with pytest.raises(parsy.ParseError):
+        incremental.reparse(tree, offset, 0, '   ')
+    # the old tree is still usable
+    tree = incremental.reparse(tree, offset, 0, 'ok')
+    assert tree.value == p_doc.parse(tree.stream)
+
+
+def test_random_edits():
+    rng = random.Random(0)
+    s = make_doc(6)
+    tree = incremental.parse(p_doc, s)
+    for _ in range(200):
+        offset = rng.randrange(len(tree.stream))
+        removed = rng.randrange(4)
+        inserted = rng.choice(['', 'a', ' ', '\n', '  b', '\n  c', '\n    d'])
+        try:
+            new_tree = incremental.reparse(tree, offset, removed, inserted)
+        except parsy.ParseError:
+            with pytest.raises(parsy.ParseError):
+                p_doc.parse(incremental.apply_edit(
+                    tree.stream, offset, removed, inserted
+                ))
+            continue
+        assert new_tree.value == p_doc.parse(new_tree.stream)
+        tree = new_tree
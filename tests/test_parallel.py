@@ -0,0 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import parsy
+import pytest
+
+from megaparsy.parallel import parse_blocks, split_blocks
+from tests.helpers import EXPECTED, TEXT
+
+
+P_BLOCK = 'tests.helpers:p_block'
+
+
+def test_split_blocks():
+    starts = split_blocks(TEXT)
+    assert [TEXT[i:i + 4] for i in starts] == ['\none', 'two\n', 'thre']
+
+
+def test_split_blocks_line_comment():
+    s = "# leading\none\n  a\n# at column 0\n  b\ntwo\n"
+    starts = split_blocks(s, line_comment='#')
+    assert [s[i:i + 3] for i in starts] == ['# l', 'two']
+    # without `line_comment` each comment line starts a construct
+    starts = split_blocks(s)
+    assert [s[i:i + 3] for i in starts] == ['# l', 'one', '# a', 'two']
+
+
+@pytest.mark.parametrize('batch_size', [None, 1, 2])
+def test_parse_blocks(batch_size):
+    with ThreadPoolExecutor(2) as executor:
+        val = parse_blocks(
+            P_BLOCK, TEXT, '#', batch_size=batch_size, executor=executor
+        )
+    assert val == EXPECTED
+
+
+def test_parse_blocks_threads_large():
+    """
+    threads parsing many blocks at once don't get in each other's way
+    """
+    n = 3000
+    s = ''.join(
+        'b{}\n  x{}\n  y\n'.format(i, i) if i % 2 else 'b{}\n'.format(i)
+        for i in range(n)
+    )
+    expected = [
+        ('b{}'.format(i), ['x{}'.format(i), 'y'] if i % 2 else [])
+        for i in range(n)
+    ]
+    with ThreadPoolExecutor(8) as executor:
+        val = parse_blocks(P_BLOCK, s, batch_size=1, executor=executor)
+    assert val == expected
+    with ThreadPoolExecutor(8) as executor:
+        val = parse_blocks(P_BLOCK, s, max_workers=8, executor=executor)
+    assert val == expected
+
+
+def test_parse_blocks_process_pool():
+    val = parse_blocks(P_BLOCK, TEXT, '#', max_workers=2)
+    assert val == EXPECTED
+
+
+def test_parse_blocks_error_position():
+    s = TEXT + "four\n  d\n  e!\n"
+    with ThreadPoolExecutor(2) as executor:
+        with pytest.raises(parsy.ParseError) as e:
+            parse_blocks(P_BLOCK, s, '#', batch_size=1, executor=executor)
+    assert e.value.stream is s
+    assert e.value.line_info() == '10:3'
@@ -0,0 +1,145 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from hypothesis import given, strategies as st
+import parsy
+import pytest
+
+from megaparsy import char, position
+from megaparsy.char.lexer import non_indented
+from megaparsy.char.lexer import (
+    NO_LINE_COMMENT,
+    space,
+    skip_block_comment,
+    skip_line_comment,
+    skip_regex,
+)
+from megaparsy.position import (
+    LineIndex,
+    column,
+    indent_table,
+    line_index,
+    line_info,
+    skip_table,
+)
+from tests.helpers import block, scn, word
+
+
+@given(st.text('ab \n'), st.data())
+def test_line_col(s, data):
+    """
+    agrees with `parsy.line_info_at` everywhere in the input
+    """
+    index = data.draw(st.integers(min_value=0, max_value=len(s)))
+    assert LineIndex(s).line_col(index) == parsy.line_info_at(s, index)
+
+
+@given(st.text('ab \n'))
+def test_line_info_parser(s):
+    p = parsy.regex(r'.*', flags=re.DOTALL) >> line_info
+    assert p.parse(s) == parsy.line_info_at(s, len(s))
+
+
+def test_column_parser():
+    p = parsy.string('ab\n  ') >> column
+    assert p.parse('ab\n  ') == 2
+
+
+def test_line_index_cached_per_stream():
+    s = 'one\ntwo\n'
+    index = line_index(s)
+    assert line_index(s) is index
+
+    other = ''.join(['one\n', 'two\n'])  # equal but not identical
+    assert line_index(other) is not index
+
+
+def test_line_index_cache_bounded():
+    streams = [
+        '{}\n'.format(i) * 2 for i in range(position.CACHE_SIZE + 2)
+    ]
+    for s in streams:
+        line_index(s)
+    assert len(position._cache.entries) <= position.CACHE_SIZE
+
+
+def test_caches_thread_safe():
+    """
+    many threads parsing different inputs at once, so that the per-stream
+    caches keep being filled and evicted
+    """
+    p_doc = non_indented(scn, block(block(word))).many()
+    docs = [
+        ''.join(
+            'top{}\n  mid\n    leaf{}\n    leaf\n  mid{}\n'.format(i, j, i)
+            for j in range(20)
+        )
+        for i in range(200)
+    ]
+    expected = [p_doc.parse(doc) for doc in docs]
+    with ThreadPoolExecutor(12) as executor:
+        assert list(executor.map(p_doc.parse, docs)) == expected
+
+
+@given(st.text('ab #\n\t'), st.sampled_from([None, '#']), st.data())
+def test_indent_table_skip(s, comment_prefix, data):
+    """
+    wherever the table has an answer, it agrees with running the
+    equivalent `space()` consumer
+    """
+    sc = space(
+        char.space1,
+        skip_line_comment(comment_prefix) if comment_prefix else NO_LINE_COMMENT,
+    )
+    p = sc >> column
+    index = data.draw(st.integers(min_value=0, max_value=len(s)))
+
+    found = indent_table(s, comment_prefix).skip(index)
+    if found is not None:
+        result = p(s, index)
+        assert found == (result.index, result.value)
+
+
+@given(
+    st.text('ab #/*\n\t'),
+    st.sampled_from([r'\s*', r'( |\t)+']),
+    st.sampled_from([(), ('#[^\n]*',), ('#[^\n]*', r'/\*[\s\S]*?\*/')]),
+)
+def test_skip_table(s, space_pattern, comment_patterns):
+    """
+    agrees everywhere with repeatedly skipping white space and comments
+    """
+    parts = [re.compile(p) for p in comment_patterns + (space_pattern,)]
+
+    def reference(index):
+        while True:
+            for part in parts:
+                match = part.match(s, index)
+                if match is not None and match.end() > index:
+                    index = match.end()
+                    break
+            else:
+                return index
+
+    table = skip_table(s, space_pattern, comment_patterns)
+    for index in range(len(s) + 1):
+        assert table.skip(index) == reference(index)
+
+
+def test_space_skip_table():
+    sc = space(
+        char.space,
+        skip_line_comment('#'),
+        skip_block_comment('/*', '*/'),
+        skip_table=True,
+    )
+    s = 'a  # x\n\n  /* y\n */ # z\n  b'
+    p = parsy.string('a') >> sc >> parsy.string('b')
+    assert p.parse(s) == 'b'
+
+
+def test_space_skip_table_requires_fusable_parts():
+    with pytest.raises(ValueError):
+        space(char.space, skip_regex('(?i)rem.*'), skip_table=True)
+    with pytest.raises(ValueError):
+        space(char.space | parsy.fail('space'), skip_table=True)
@@ -0,0 +1,9 @@
+from megaparsy.state import ParseState, parse_state
+
+
+def test_parse_state_per_stream():
+    s = 'abc\n'
+    state = parse_state(s)
+    assert isinstance(state, ParseState)
+    assert parse_state(s) is state
+    assert parse_state(''.join(['abc', '\n'])) is not state
@@ -0,0 +1,44 @@
+import io
+
+import parsy
+import pytest
+
+from megaparsy.parallel import split_blocks
+from megaparsy.streaming import BlockParseError, iter_blocks, iter_parse_blocks
+from tests import helpers
+from tests.helpers import p_block
+
+
+TEXT = helpers.TEXT.replace('  b\n', '# comment\n  b\n')
+
+
+@pytest.mark.parametrize('line_comment', [None, '#'])
+def test_iter_blocks(line_comment):
+    """
+    same split as `split_blocks` on the whole string
+    """
+    blocks = list(iter_blocks(io.StringIO(TEXT), line_comment))
+    starts = split_blocks(TEXT, line_comment)
+    assert [offset for offset, _, _ in blocks] == starts
+    assert [text for _, _, text in blocks] == [
+        TEXT[start:end] for start, end in zip(starts, starts[1:] + [len(TEXT)])
+    ]
+    assert [TEXT.count('\n', 0, offset) for offset in starts] == [
+        line for _, line, _ in blocks
+    ]
+
+
+def test_iter_parse_blocks():
+    text = TEXT.replace('# comment\n', '')
+    val = iter_parse_blocks(p_block, io.StringIO(text))
+    assert next(val) == ('one', ['a', 'b'])
+    assert list(val) == [('two', []), ('three', ['c'])]
+
+
+def test_iter_parse_blocks_error():
+    text = TEXT.replace('# comment\n', '') + "four\n  d!\n"
+    with pytest.raises(BlockParseError) as e:
+        list(iter_parse_blocks(p_block, io.StringIO(text)))
+    assert e.value.line_info() == '9:3'
+    assert e.value.offset == text.index('four')
+    assert isinstance(e.value, parsy.ParseError)